@@ -0,0 +1,66 @@
+'''
+Middleware for the whole site
+'''
+
+import os
+
+from django.conf import settings
+from django.middleware import gzip
+from whitenoise import middleware
+
+
+class GZipMiddleware(gzip.GZipMiddleware):
+    '''
+    Compresses responses like Django's GZipMiddleware, except those
+    that can be requested in byte ranges: compressing them on the fly
+    would change the bytes the ranges refer to
+    '''
+
+    def process_response(self, request, response):
+        if response.get('Accept-Ranges') == 'bytes':
+            return response
+        return super().process_response(request, response)
+
+
+class WhiteNoiseMiddleware(middleware.WhiteNoiseMiddleware):
+    '''
+    Serves static files like WhiteNoise's middleware, and the dataset
+    snapshots in SNAPSHOTS_ROOT at SNAPSHOTS_URL (see
+    public_website.snapshots).
+
+    New snapshots are written while the site is running, so they are
+    looked up on disk for each request instead of being listed once at
+    startup. Their names hold a hash of their contents, so all of them
+    but the manifest are cached forever.
+    '''
+
+    def __init__(self, get_response=None, settings=settings):
+        # set before WhiteNoise adds the static files, which asks
+        # immutable_file_test() about each of them
+        self.snapshots_root = os.path.join(os.path.abspath(settings.SNAPSHOTS_ROOT), '')
+        self.snapshots_prefix = settings.SNAPSHOTS_URL
+        super().__init__(get_response, settings)
+
+    def process_request(self, request):
+        if request.path_info.startswith(self.snapshots_prefix):
+            static_file = self.find_snapshot(request.path_info)
+            if static_file is not None:
+                return self.serve(static_file, request)
+            return None
+        return super().process_request(request)
+
+    def find_snapshot(self, url):
+        if not self.url_is_canonical(url):
+            return None
+
+        path = os.path.join(self.snapshots_root, url[len(self.snapshots_prefix):])
+        if os.path.commonprefix((self.snapshots_root, path)) != self.snapshots_root \
+                or not os.path.isfile(path):
+            return None
+        return self.get_static_file(path, url)
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(self.snapshots_prefix):
+            # the manifest is replaced every night
+            return not url.endswith('.json')
+        return super().immutable_file_test(path, url)
@@ -50,11 +50,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'django.middleware.gzip.GZipMiddleware',
+    'core.middleware.GZipMiddleware',
     'htmlmin.middleware.HtmlMinifyMiddleware',
     'htmlmin.middleware.MarkRequestMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -122,7 +122,22 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'dashboard.tasks.update_to_cloud_task',
         'schedule':crontab(minute=0, hour=9),
         'args': (),
-    }
+    },
+    'update-suggestions': {
+        'task': 'dashboard.tasks.update_suggestions',
+        'schedule': crontab(minute=30, hour=3),
+        'args': (),
+    },
+    'refresh-question-statistics': {
+        'task': 'dashboard.tasks.refresh_question_statistics',
+        'schedule': crontab(minute=15, hour='*/1'),
+        'args': (),
+    },
+    'write-dataset-snapshots': {
+        'task': 'dashboard.tasks.write_dataset_snapshots',
+        'schedule': crontab(minute=0, hour=2),
+        'args': (),
+    },
 }
 
 # Custom Auth System settings
@@ -235,10 +250,25 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
 
 DATA_UPLOAD_MAX_MEMORY_SIZE = 20971520
 
+# Uploaded files larger than this are streamed to a temporary file
+# instead of being held in memory; question sheets are read from there
+# a chunk at a time (see dashboard.spreadsheets)
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1048576
+
+# Where the daily question export is uploaded: 'google-sheets', or
+# 'local' to write it to QUESTION_EXPORT_DIR (see dashboard.exports)
+QUESTION_EXPORT_UPLOADER = os.environ.get('QUESTION_EXPORT_UPLOADER', 'google-sheets')
+QUESTION_EXPORT_DIR = os.path.join(BASE_DIR, 'uploads/exports/')
+
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# Nightly snapshots of the question corpus, served by
+# core.middleware.WhiteNoiseMiddleware (see public_website.snapshots)
+SNAPSHOTS_ROOT = os.path.join(MEDIA_ROOT, 'snapshots')
+SNAPSHOTS_URL = '/snapshots/'
+
 # settings for compressor to minify html content and static files such as css or js too 
 STATICFILES_FINDERS = (
     'django.contrib.staticfiles.finders.FileSystemFinder',
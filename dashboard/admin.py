@@ -1,4 +1,4 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.contenttypes.models import ContentType
 from django.shortcuts import redirect
 from django.urls import reverse
@@ -6,6 +6,7 @@ from django.utils.http import urlencode
 from django.utils.translation import gettext as _
 
 from .models import (
+    QuestionArchive,
     Question,
     Answer,
     Article,
@@ -123,6 +124,34 @@ class AnswerAdmin(admin.ModelAdmin):
     change_language = make_bulk_updater('language')
 
 
+@admin.register(QuestionArchive)
+class QuestionArchiveAdmin(admin.ModelAdmin):
+    search_fields = ['id', 'question_text', 'question_text_english']
+    list_filter = ['language', 'state', 'submitted_by']
+    list_display = ['id', 'question_text', 'question_text_english', 'language', 'state', 'submitted_by', 'created_on']
+    date_hierarchy = 'created_on'
+
+    actions = ['accept_questions']
+
+    def accept_questions(self, request, queryset):
+        result = QuestionArchive.accept_questions(
+            queryset.values_list('pk', flat=True),
+            request.user)
+
+        self.message_user(
+            request,
+            _('Accepted %(count)d question(s).') % {'count': len(result['moved'])},
+            messages.SUCCESS)
+        if result['failed']:
+            self.message_user(
+                request,
+                _('Could not accept question(s) %(ids)s; they may have been accepted already.') % {
+                    'ids': ', '.join(str(pk) for pk in result['failed']),
+                },
+                messages.WARNING)
+    accept_questions.short_description = _('Accept selected questions')
+
+
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
     search_fields = ['id', 'question_text', 'question_text_english']
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class DashboardConfig(AppConfig):
     name = 'dashboard'
+
+    def ready(self):
+        # connect signal handlers
+        import dashboard.signals
@@ -0,0 +1,313 @@
+'''
+Exports of the question table.
+
+An export reads its rows through a server-side cursor, a chunk at a
+time, and writes them as CSV to a temporary file; the file is then
+handed to an uploader, which sends it on in chunks. So however many
+questions there are, neither step holds more than one chunk of them in
+memory.
+
+Where an export goes is up to the uploader. GoogleSheetUploader
+replaces the "questions" Google Sheet the team's dashboards read
+from, and LocalFileUploader copies the file to a directory instead,
+which is what to use in development and tests. The
+QUESTION_EXPORT_UPLOADER setting picks one of UPLOADERS.
+
+Incremental exports keep a snapshot of the export on disk, sorted by
+id, and an ExportCheckpoint of the last question and tombstone they
+included. Each run fetches only the questions changed and the
+tombstones recorded since the checkpoint (with keyset conditions on
+indexed (updated_on, id) and (deleted_on, id) pairs), and merges them
+into the snapshot in one pass over the file. The database work is then
+proportional to the number of changes rather than of questions.
+'''
+
+import csv
+import datetime
+import io
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from dashboard.models import ExportCheckpoint, Question, QuestionTombstone
+
+# Rows fetched from the database at a time
+EXPORT_CHUNK_SIZE = 2000
+
+# Bytes read from the export file at a time when uploading it
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+QUESTION_EXPORT_FIELDS = [
+    'state',
+    'student_gender',
+    'student_class',
+    'question_format',
+    'contributor_role',
+    'context',
+    'medium_language',
+    'curriculum_followed',
+    'question_asked_on',
+    'field_of_interest',
+    'language',
+    'question_text_english',
+    'question_text',
+    'id',
+]
+
+QUESTION_EXPORT_FILE_NAME = 'question_tableau.csv'
+QUESTION_SNAPSHOT_FILE_NAME = 'question_snapshot.csv'
+
+# Rows are only exported incrementally once they are this old. A
+# row's updated_on is set before its transaction commits, so a newer
+# row can become visible after an older one; waiting lets those
+# transactions finish before the checkpoint moves past them.
+EXPORT_SETTLE_TIME = datetime.timedelta(minutes=10)
+
+
+def write_csv(rows, fields, f):
+    '''
+    Writes a header of the field names and then the rows (tuples of
+    values, in the order of the fields) to the text file f. Returns
+    the number of rows written.
+    '''
+
+    writer = csv.writer(f)
+    writer.writerow(fields)
+
+    count = 0
+    for row in rows:
+        writer.writerow([str(value) for value in row])
+        count += 1
+    return count
+
+
+def export_questions(f, fields=QUESTION_EXPORT_FIELDS, chunk_size=EXPORT_CHUNK_SIZE):
+    '''
+    Writes the given fields of all questions as CSV to the binary file
+    f, reading the questions through a server-side cursor. Returns the
+    number of rows written.
+    '''
+
+    rows = (Question.objects
+        .order_by('id')
+        .values_list(*fields)
+        .iterator(chunk_size=chunk_size))
+
+    text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+    try:
+        return write_csv(rows, fields, text)
+    finally:
+        text.flush()
+        # leave f open for the uploader
+        text.detach()
+
+
+class LocalFileUploader:
+    '''
+    Copies exports to a directory on this machine
+    '''
+
+    def __init__(self, directory=None):
+        self.directory = directory or settings.QUESTION_EXPORT_DIR
+
+    def upload(self, f, name):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+
+        # replace the file in one step, so readers never see it
+        # half-written
+        temp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp_path, 'wb') as out:
+            shutil.copyfileobj(f, out, UPLOAD_CHUNK_SIZE)
+        os.replace(temp_path, path)
+
+
+class GoogleSheetUploader:
+    '''
+    Replaces the contents of a Google Sheet with exports
+    '''
+
+    scope = [
+        'https://spreadsheets.google.com/feeds',
+        'https://www.googleapis.com/auth/spreadsheets',
+        'https://www.googleapis.com/auth/drive',
+    ]
+
+    def __init__(self, spreadsheet_name='questions'):
+        self.spreadsheet_name = spreadsheet_name
+
+    def get_client(self):
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+
+        creds = ServiceAccountCredentials.from_json_keyfile_name(
+            os.environ.get('google_secret_key_file'), self.scope)
+        return gspread.authorize(creds)
+
+    def upload(self, f, name):
+        client = self.get_client()
+        spreadsheet = client.open(self.spreadsheet_name)
+        # requests sends a file object as the request body a block at
+        # a time, rather than reading it all first
+        client.import_csv(spreadsheet.id, data=f)
+
+
+UPLOADERS = {
+    'google-sheets': GoogleSheetUploader,
+    'local': LocalFileUploader,
+}
+
+
+def get_uploader():
+    return UPLOADERS[settings.QUESTION_EXPORT_UPLOADER]()
+
+
+def upload_question_export(uploader=None, chunk_size=EXPORT_CHUNK_SIZE):
+    '''
+    Exports all questions to a temporary file and uploads it. Returns
+    the number of rows exported.
+    '''
+
+    uploader = uploader or get_uploader()
+
+    with tempfile.TemporaryFile() as f:
+        count = export_questions(f, chunk_size=chunk_size)
+        f.seek(0)
+        uploader.upload(f, QUESTION_EXPORT_FILE_NAME)
+
+    return count
+
+
+def get_snapshot_path():
+    return os.path.join(settings.QUESTION_EXPORT_DIR, QUESTION_SNAPSHOT_FILE_NAME)
+
+
+def after(time_field, last_time, last_id):
+    '''
+    Returns a condition for the rows after (last_time, last_id) in
+    (time_field, id) order
+    '''
+
+    if last_time is None:
+        return Q()
+    return Q(**{time_field + '__gt': last_time}) \
+        | Q(**{time_field: last_time, 'id__gt': last_id})
+
+
+def merge_rows(rows, changes, deleted_ids, id_column):
+    '''
+    Yields the rows of a snapshot sorted by id, with the changed rows
+    (in `changes`, a dict of id -> row) replaced or inserted in their
+    place and the deleted rows left out
+    '''
+
+    pending = sorted(
+        (row_id, row) for row_id, row in changes.items()
+        if row_id not in deleted_ids)
+    position = 0
+
+    for row in rows:
+        row_id = int(row[id_column])
+        while position < len(pending) and pending[position][0] < row_id:
+            yield pending[position][1]
+            position += 1
+
+        if position < len(pending) and pending[position][0] == row_id:
+            yield pending[position][1]
+            position += 1
+        elif row_id not in deleted_ids:
+            yield row
+
+    for row_id, row in pending[position:]:
+        yield row
+
+
+def write_full_snapshot(path, chunk_size):
+    with open(path, 'wb') as f:
+        export_questions(f, chunk_size=chunk_size)
+
+
+def write_merged_snapshot(path, snapshot_path, changes, deleted_ids):
+    fields = QUESTION_EXPORT_FIELDS
+    with open(snapshot_path, 'r', newline='', encoding='utf-8') as old, \
+            open(path, 'w', newline='', encoding='utf-8') as new:
+        rows = csv.reader(old)
+        next(rows)  # header
+        write_csv(merge_rows(rows, changes, deleted_ids, fields.index('id')), fields, new)
+
+
+def upload_question_delta(uploader=None, full=False, chunk_size=EXPORT_CHUNK_SIZE):
+    '''
+    Brings the export snapshot up to date with the questions changed
+    and deleted since the last run, and uploads it. Falls back to a
+    full export when there is no checkpoint or snapshot yet, or when
+    `full` is set. Returns a dict of what was exported.
+    '''
+
+    uploader = uploader or get_uploader()
+    cutoff = timezone.now() - EXPORT_SETTLE_TIME
+    snapshot_path = get_snapshot_path()
+    os.makedirs(settings.QUESTION_EXPORT_DIR, exist_ok=True)
+
+    checkpoint, _ = ExportCheckpoint.objects.get_or_create(name='questions')
+    full = full or checkpoint.last_updated_on is None \
+        or not os.path.isfile(snapshot_path)
+
+    questions = Question.objects.filter(updated_on__lt=cutoff)
+    tombstones = QuestionTombstone.objects.filter(deleted_on__lt=cutoff)
+    if not full:
+        questions = questions.filter(after(
+            'updated_on', checkpoint.last_updated_on, checkpoint.last_id))
+        tombstones = tombstones.filter(after(
+            'deleted_on', checkpoint.last_deleted_on, checkpoint.last_tombstone_id))
+
+    # find the new checkpoint before exporting, so that nothing saved
+    # while the export runs is skipped by the next one
+    last_question = questions.order_by('-updated_on', '-id') \
+        .values_list('updated_on', 'id').first()
+    last_tombstone = tombstones.order_by('-deleted_on', '-id') \
+        .values_list('deleted_on', 'id').first()
+
+    temp_path = '{}.{}.tmp'.format(snapshot_path, os.getpid())
+    if full:
+        write_full_snapshot(temp_path, chunk_size)
+        changed_count = None
+        deleted_ids = set()
+    else:
+        changes = {}
+        for row in questions.values_list(*QUESTION_EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+            changes[row[QUESTION_EXPORT_FIELDS.index('id')]] = [str(value) for value in row]
+        changed_count = len(changes)
+        deleted_ids = set(tombstones.values_list('question_id', flat=True))
+
+        write_merged_snapshot(temp_path, snapshot_path, changes, deleted_ids)
+    os.replace(temp_path, snapshot_path)
+
+    if last_question is not None:
+        checkpoint.last_updated_on, checkpoint.last_id = last_question
+    elif full:
+        # nothing to export yet; start from the beginning next time
+        checkpoint.last_updated_on, checkpoint.last_id = cutoff, 0
+    if last_tombstone is not None:
+        checkpoint.last_deleted_on, checkpoint.last_tombstone_id = last_tombstone
+    elif full and checkpoint.last_deleted_on is None:
+        checkpoint.last_deleted_on = cutoff
+    checkpoint.exported_on = timezone.now()
+    checkpoint.save()
+
+    # the tombstones have been applied, and are never needed again
+    QuestionTombstone.objects.exclude(after(
+        'deleted_on', checkpoint.last_deleted_on, checkpoint.last_tombstone_id)).delete()
+
+    with open(snapshot_path, 'rb') as f:
+        uploader.upload(f, QUESTION_EXPORT_FILE_NAME)
+
+    return {
+        'full': full,
+        'changed': changed_count,
+        'deleted': len(deleted_ids),
+    }
@@ -0,0 +1,517 @@
+'''
+Ingestion of question spreadsheets.
+
+Uploaded sheets are cleaned a column at a time with pandas, rather
+than cell by cell, and the resulting rows are written with
+bulk_create in batches inside a single transaction: either the whole
+sheet is saved or none of it is. The time taken by each batch is
+logged and returned in an IngestionReport.
+
+Uploads are not processed in the request that receives them. The
+view stores the file and creates an IngestionJob, and the
+ingest_dataset task then runs the job with run_job(); the dashboard
+polls the job for its progress. Jobs read their sheet a chunk at a
+time (see dashboard.spreadsheets), so the memory they need doesn't
+grow with the size of the sheet.
+'''
+
+import itertools
+import logging
+import os
+import shutil
+import time
+
+import pandas as pd
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard.models import (
+    Dataset,
+    IngestionJob,
+    Question,
+    QuestionArchive,
+    UnencodedSubmission,
+)
+from dashboard.search import bump_generation
+from dashboard.spreadsheets import (
+    SheetWriter,
+    estimate_row_count,
+    parse_dates,
+    read_sheet,
+)
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INGESTION_UPLOADS_DIR = os.path.join(BASE_DIR, 'uploads/ingestion/')
+
+# Rows written per INSERT statement
+INGESTION_BATCH_SIZE = 500
+
+# Spreadsheet column -> model field
+QUESTION_COLUMNS = {
+    'Question': 'question_text',
+    'Question Language': 'language',
+    'English translation of the question': 'question_text_english',
+    'How was the question originally asked?': 'question_format',
+    'Context': 'context',
+    'Date of asking the question': 'question_asked_on',
+    'Student Name': 'student_name',
+    'Gender': 'student_gender',
+    'Student Class': 'student_class',
+    'School Name': 'school',
+    'Curriculum followed': 'curriculum_followed',
+    'Medium of instruction': 'medium_language',
+    'Area': 'area',
+    'State': 'state',
+    'Published (Yes/No)': 'published',
+    'Publication Name': 'published_source',
+    'Publication Date': 'published_date',
+    'Notes': 'notes',
+    'Contributor Name': 'contributor',
+    'Contributor Role': 'contributor_role',
+}
+CURATED_QUESTION_COLUMNS = dict(QUESTION_COLUMNS, **{
+    'Field of Interest': 'field_of_interest',
+    'dataset_id': 'dataset_id',
+})
+
+# Encoding sheet column -> Question field
+ENCODING_COLUMNS = {
+    'Subject of class/session': 'subject_of_session',
+    'Question topic "R"elated or "U"nrelated to the topic or "S"ponteneous': 'question_topic_relation',
+    'Motivation for asking question': 'motivation',
+    'Type of information requested': 'type_of_information',
+    'Source': 'source',
+    'Curiosity index': 'curiosity_index',
+    'Urban/Rural': 'urban_or_rural',
+    'Type of school': 'type_of_school',
+    'Comments for coding rationale': 'comments_on_coding_rationale',
+}
+
+# Model fields filled in from date columns
+DATE_FIELDS = ['question_asked_on', 'published_date']
+
+# Model field -> {value in the sheet: value to save}
+VALUE_ALIASES = {
+    'field_of_interest': {
+        'History-Philosophy & Practice of Science': 'History, Philosophy & Practice of Science',
+    },
+}
+
+
+class IngestionError(Exception):
+    '''
+    A problem with an uploaded sheet that the uploader has to fix
+    '''
+
+
+class IngestionReport:
+    '''
+    The number of rows written (and of duplicate rows skipped), and
+    how long each batch took
+    '''
+
+    def __init__(self):
+        self.row_count = 0
+        self.duplicate_count = 0
+        self.batch_timings = []
+
+    def add_batch(self, row_count, seconds):
+        self.row_count += row_count
+        self.batch_timings.append((row_count, seconds))
+
+    @property
+    def total_seconds(self):
+        return sum(seconds for row_count, seconds in self.batch_timings)
+
+    def __str__(self):
+        return '{} rows ({} duplicates skipped) in {} batches, {:.2f}s'.format(
+            self.row_count, self.duplicate_count,
+            len(self.batch_timings), self.total_seconds)
+
+
+def clean_sheet(sheet, column_mapping):
+    '''
+    Returns a copy of the sheet with its columns renamed to model
+    fields: rows without a question are dropped, text is stripped,
+    known aliases are replaced (see VALUE_ALIASES), dates are parsed
+    the way the validators read them and 'Published (Yes/No)' is
+    turned into a boolean
+    '''
+
+    sheet = sheet.rename(columns=lambda column: str(column).strip())
+    sheet = sheet[[column for column in sheet.columns if column in column_mapping]]
+    sheet = sheet.rename(columns=column_mapping)
+
+    sheet = sheet[sheet['question_text'].notna()].copy()
+
+    for field in sheet.columns:
+        column = sheet[field]
+        if column.dtype == object:
+            # .str.strip() gives NaN for anything that isn't text, so
+            # only take its result where there was text to strip
+            stripped = column.str.strip()
+            sheet[field] = stripped.where(stripped.notna(), column)
+
+    for field, aliases in VALUE_ALIASES.items():
+        if field in sheet.columns:
+            sheet[field] = sheet[field].replace(aliases)
+
+    for field in DATE_FIELDS:
+        if field in sheet.columns:
+            dates = parse_dates(sheet[field])
+            sheet[field] = dates.dt.date.astype(object).where(dates.notna(), None)
+
+    if 'published' in sheet.columns:
+        sheet['published'] = sheet['published'] == 'Yes'
+
+    return sheet
+
+
+def sheet_to_records(sheet):
+    '''
+    Yields a dict of field values per row. Empty cells are left out,
+    so that the model's defaults apply to them.
+    '''
+
+    sheet = sheet.astype(object).where(sheet.notna(), None)
+    for record in sheet.to_dict('records'):
+        yield {
+            field: value
+            for field, value in record.items()
+            if value is not None
+        }
+
+
+def find_duplicate_hashes(hashes, models):
+    '''
+    Returns the given content hashes that any of the models already
+    has, in one query
+    '''
+
+    querysets = [
+        model.objects.filter(content_hash__in=hashes).values_list('content_hash')
+        for model in models
+    ]
+    return {
+        content_hash
+        for content_hash, in querysets[0].union(*querysets[1:])
+    }
+
+
+def bulk_ingest(model, records, batch_size=INGESTION_BATCH_SIZE,
+    progress=None, skip_duplicates_in=None, **values):
+    '''
+    Creates a `model` instance for each record, with the given values
+    in addition, in batches of `batch_size` inside one transaction.
+    `progress` is called with the number of rows processed after each
+    batch. Returns an IngestionReport.
+
+    With `skip_duplicates_in`, a list of models with a content hash,
+    rows whose content hash is already in one of those models, or
+    earlier in the same sheet, are skipped and counted in the report.
+    '''
+
+    report = IngestionReport()
+    batch = []
+    seen_hashes = set()
+
+    def write_batch():
+        start = time.perf_counter()
+
+        rows = batch
+        if skip_duplicates_in:
+            hashes = {obj.content_hash for obj in batch}
+            seen_hashes.update(find_duplicate_hashes(hashes, skip_duplicates_in))
+
+            rows = []
+            for obj in batch:
+                if obj.content_hash in seen_hashes:
+                    report.duplicate_count += 1
+                    continue
+                seen_hashes.add(obj.content_hash)
+                rows.append(obj)
+
+        model.objects.bulk_create(rows)
+        seconds = time.perf_counter() - start
+
+        report.add_batch(len(rows), seconds)
+        if progress is not None:
+            progress(report.row_count + report.duplicate_count)
+        logger.info('Wrote %d %s rows in %.3fs',
+            len(rows), model._meta.db_table, seconds)
+        batch.clear()
+
+    with transaction.atomic():
+        for record in records:
+            obj = model(**record, **values)
+            # bulk_create() doesn't call save(), which sets the hash
+            if hasattr(obj, 'update_content_hash'):
+                obj.update_content_hash()
+            batch.append(obj)
+
+            if len(batch) >= batch_size:
+                write_batch()
+        if batch:
+            write_batch()
+
+    logger.info('Ingested %s into %s', report, model._meta.db_table)
+    return report
+
+
+def ingest_questions(chunks, model, column_mapping=QUESTION_COLUMNS,
+    batch_size=INGESTION_BATCH_SIZE, progress=None, skip_duplicates_in=None,
+    **values):
+    '''
+    Cleans a question spreadsheet, given as a DataFrame or as chunks
+    of one (see dashboard.spreadsheets.read_sheet), and saves its rows
+    as `model` instances. Returns an IngestionReport.
+    '''
+
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+
+    records = (
+        record
+        for chunk in chunks
+        for record in sheet_to_records(clean_sheet(chunk, column_mapping))
+    )
+    return bulk_ingest(model, records, batch_size, progress,
+        skip_duplicates_in, **values)
+
+
+def start_job(kind, uploaded_file, user):
+    '''
+    Stores an uploaded sheet and queues an IngestionJob for it.
+    Returns the job.
+    '''
+
+    # imported here since the tasks depend on this module
+    from dashboard.tasks import ingest_dataset
+
+    storage = FileSystemStorage(location=INGESTION_UPLOADS_DIR)
+    file_name = storage.save(uploaded_file.name, uploaded_file)
+
+    job = IngestionJob.objects.create(
+        kind=kind,
+        file_path=storage.path(file_name),
+        file_name=uploaded_file.name,
+        submitted_by=user)
+
+    # only queue the job once it is visible to the worker
+    transaction.on_commit(lambda: ingest_dataset.delay(job.id))
+    return job
+
+
+def run_job(job):
+    '''
+    Reads the job's sheet and saves it according to the kind of job,
+    recording the outcome on the job
+    '''
+
+    job.status = IngestionJob.STATUS_RUNNING
+    job.save(update_fields=['status', 'updated_on'])
+
+    try:
+        job.total_rows = estimate_row_count(job.file_path)
+        job.save(update_fields=['total_rows', 'updated_on'])
+
+        JOB_HANDLERS[job.kind](job, read_sheet(job.file_path))
+    except IngestionError as e:
+        job.status = IngestionJob.STATUS_FAILED
+        job.processed_rows = 0
+        job.errors.append(str(e))
+    except Exception:
+        # the rows are written in one transaction, so none were saved
+        job.status = IngestionJob.STATUS_FAILED
+        job.processed_rows = 0
+        job.errors.append('Something went wrong while saving this sheet. Please get in touch with us to get help!')
+        raise
+    else:
+        job.status = IngestionJob.STATUS_DONE
+        job.total_rows = job.processed_rows
+    finally:
+        job.finished_on = timezone.now()
+        job.save()
+
+
+def copy_for_curation(chunks, path, dataset):
+    '''
+    Passes the chunks of a sheet through, writing each of them to an
+    Excel file for curators as it goes, with the columns they fill in
+    added
+    '''
+
+    writer = None
+    for chunk in chunks:
+        curation_chunk = chunk.copy()
+        curation_chunk['Field of Interest'] = ''
+        curation_chunk['dataset_id'] = dataset.id
+
+        if writer is None:
+            writer = SheetWriter(path, curation_chunk.columns)
+        writer.write(curation_chunk)
+
+        yield chunk
+
+    if writer is not None:
+        writer.close()
+
+
+def ingest_submitted_questions(job, chunks):
+    '''
+    Saves newly submitted questions to the archive as a new dataset,
+    along with copies of the sheet for archiving and curation
+    '''
+
+    with transaction.atomic():
+        # create an entry for the dataset
+        dataset = Dataset()
+        dataset.question_count = 0
+        dataset.submitted_by = job.submitted_by
+        dataset.status = 'new'
+        dataset.save()
+
+        # create file for curation while saving the questions
+        uncurated_filename = 'dataset_' + str(dataset.id) + '_uncurated.xlsx'
+        report = ingest_questions(
+            copy_for_curation(
+                chunks,
+                os.path.join(BASE_DIR, 'uploads/submissions/uncurated/' + uncurated_filename),
+                dataset),
+            QuestionArchive,
+            progress=job.set_progress,
+            skip_duplicates_in=[QuestionArchive, Question],
+            submitted_by=job.submitted_by)
+
+        dataset.question_count = report.row_count
+        dataset.save()
+
+    job.dataset = dataset
+    job.processed_rows = report.row_count
+    if report.duplicate_count:
+        job.errors.append('Skipped {} question(s) that had already been submitted.'.format(
+            report.duplicate_count))
+
+    # keep the uploaded file for archiving
+    raw_filename = 'dataset_' + str(dataset.id) + '_raw' \
+        + os.path.splitext(job.file_path)[1]
+    shutil.copyfile(
+        job.file_path,
+        os.path.join(BASE_DIR, 'uploads/submissions/raw/' + raw_filename))
+
+
+def ingest_curated_questions(job, chunks):
+    '''
+    Saves the questions of a curated dataset to the Question table
+    '''
+
+    first_chunk = next(chunks)
+    chunks = itertools.chain([first_chunk], chunks)
+
+    # verify the dataset_id
+    dataset_id = list(first_chunk['dataset_id'])[0] if len(first_chunk.index) else None
+
+    with transaction.atomic():
+        # lock the dataset, so the same dataset can't be curated twice
+        # by uploads running at the same time
+        try:
+            dataset = Dataset.objects.select_for_update().get(id=dataset_id)
+        except (Dataset.DoesNotExist, ValueError, TypeError):
+            raise IngestionError('We could not find that dataset by ID. Make sure you did not edit any other field except "Field of Interest".')
+
+        if dataset.status == 'curated':
+            raise IngestionError('This dataset is already curated. Make sure you are uploading the correct file.')
+
+        job.dataset = dataset
+
+        report = ingest_questions(
+            chunks,
+            Question,
+            column_mapping=CURATED_QUESTION_COLUMNS,
+            progress=job.set_progress,
+            skip_duplicates_in=[Question],
+            curated_by=job.submitted_by)
+
+        # update status of the dataset
+        dataset.status = 'curated'
+        dataset.save()
+
+    job.processed_rows = report.row_count
+    if report.duplicate_count:
+        job.errors.append('Skipped {} question(s) that had already been curated.'.format(
+            report.duplicate_count))
+
+    # the questions were created without going through save(), so no
+    # signal has told search about them
+    bump_generation()
+
+
+def ingest_encoded_questions(job, chunks):
+    '''
+    Saves the encoding information of a sheet to its questions. Each
+    chunk of the sheet takes one query to fetch its questions and
+    bulk updates that only write the encoding fields. Rows whose
+    question doesn't exist are skipped and listed in the job's errors.
+    '''
+
+    submission_id = None
+    updated_fields = list(ENCODING_COLUMNS.values()) + ['encoded_by', 'updated_on']
+
+    with transaction.atomic():
+        for chunk in chunks:
+            if not len(chunk.index):
+                continue
+            if submission_id is None:
+                submission_id = chunk['submission_id'].iloc[0]
+
+            ids = pd.to_numeric(chunk['id'], errors='coerce')
+            questions = Question.objects.in_bulk(
+                [int(pk) for pk in ids.dropna().unique()])
+
+            values = chunk[list(ENCODING_COLUMNS)].rename(columns=ENCODING_COLUMNS)
+            values = values.astype(object).where(values.notna(), '')
+
+            now = timezone.now()
+            updated = []
+            for index, pk, record in zip(chunk.index, ids, values.to_dict('records')):
+                question = questions.get(int(pk)) if pd.notna(pk) else None
+                if question is None:
+                    # Adding 1 to compensate for 0 indexing
+                    job.errors.append('Row #{}: there is no question with ID "{}".'.format(
+                        index + 1, chunk['id'][index]))
+                    continue
+
+                for field, value in record.items():
+                    setattr(question, field, value)
+                question.encoded_by = job.submitted_by
+                # bulk_update() doesn't set auto_now fields
+                question.updated_on = now
+                updated.append(question)
+
+            Question.objects.bulk_update(
+                updated, updated_fields, batch_size=INGESTION_BATCH_SIZE)
+            job.processed_rows += len(updated)
+            job.set_progress(job.processed_rows)
+
+        # set the UnencodedSubmission entry as curated
+        try:
+            unencoded_submission_entry = UnencodedSubmission \
+                .objects.get(submission_id=int(submission_id))
+        except (UnencodedSubmission.DoesNotExist, ValueError, TypeError):
+            raise IngestionError('We could not find that submission by ID. Make sure you did not edit the "submission_id" column.')
+        unencoded_submission_entry.encoded = True
+        unencoded_submission_entry.save()
+
+    # bulk_update() sends no post_save signals, so the cached search
+    # results have to be invalidated here
+    bump_generation()
+
+
+JOB_HANDLERS = {
+    IngestionJob.KIND_QUESTIONS: ingest_submitted_questions,
+    IngestionJob.KIND_CURATED: ingest_curated_questions,
+    IngestionJob.KIND_ENCODED: ingest_encoded_questions,
+}
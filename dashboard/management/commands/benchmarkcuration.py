@@ -0,0 +1,140 @@
+"""
+Compare the throughput of saving a curated dataset row by row with
+the batched import used by curation jobs.
+
+Both runs save the same generated sheet inside a transaction that is
+rolled back afterwards, so the command leaves no data behind.
+"""
+import time
+
+import pandas as pd
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from dashboard.ingestion import (
+    CURATED_QUESTION_COLUMNS,
+    INGESTION_BATCH_SIZE,
+    ingest_questions,
+)
+from dashboard.models import Question
+from sawaliram_auth.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmarks row-by-row against batched import of curated questions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=5000,
+            help='Number of rows in the generated sheet')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=INGESTION_BATCH_SIZE,
+            help='Number of rows per INSERT in the batched import')
+
+    def make_sheet(self, rows):
+        return pd.DataFrame({
+            'Question': ['Why is the sky blue? ({})'.format(i) for i in range(rows)],
+            'Question Language': ['en'] * rows,
+            'Context': ['Classroom'] * rows,
+            'Gender': ['Female', 'Male'] * (rows // 2) + ['Female'] * (rows % 2),
+            'Student Class': [7.0] * rows,
+            'State': [' Goa '] * rows,
+            'Published (Yes/No)': ['No'] * rows,
+            'Contributor Name': ['Hugin Hrafna'] * rows,
+            'Field of Interest': ['History-Philosophy & Practice of Science'] * rows,
+            'dataset_id': [1] * rows,
+        })
+
+    def save_row_by_row(self, sheet, user):
+        """
+        The way CurateDataset used to save a sheet: one Question and
+        one INSERT per row
+        """
+        columns = list(sheet)
+        for index, row in sheet.iterrows():
+            question = Question()
+
+            for column in columns:
+                column = column.strip()
+
+                # check if the value is not nan
+                if not row[column] != row[column]:
+
+                    if column == 'Published (Yes/No)':
+                        setattr(
+                            question,
+                            CURATED_QUESTION_COLUMNS[column],
+                            True if row[column] == 'Yes' else False)
+                    elif column == 'Field of Interest':
+                        if row[column] == 'History-Philosophy & Practice of Science':
+                            value = 'History, Philosophy & Practice of Science'
+                        else:
+                            value = row[column]
+                        setattr(
+                            question,
+                            CURATED_QUESTION_COLUMNS[column],
+                            value.strip() if isinstance(value, str) else value)
+                    else:
+                        setattr(
+                            question,
+                            CURATED_QUESTION_COLUMNS[column],
+                            row[column].strip() if isinstance(row[column], str) else row[column])
+
+            question.curated_by = user
+            question.save()
+
+    def save_batched(self, sheet, user, batch_size):
+        ingest_questions(
+            sheet,
+            Question,
+            column_mapping=CURATED_QUESTION_COLUMNS,
+            batch_size=batch_size,
+            curated_by=user)
+
+    def time_rolled_back(self, save):
+        """
+        Run save(user) in a transaction that is rolled back, and
+        return how long it took
+        """
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    first_name='Benchmark',
+                    last_name='Curator',
+                    organisation='Sawaliram',
+                    email='benchmark-curator@sawaliram.org',
+                    password=None,
+                )
+                start = time.perf_counter()
+                save(user)
+                seconds = time.perf_counter() - start
+                raise Rollback
+        except Rollback:
+            pass
+        return seconds
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        sheet = self.make_sheet(rows)
+
+        results = [
+            ('row by row', self.time_rolled_back(
+                lambda user: self.save_row_by_row(sheet, user))),
+            ('batched', self.time_rolled_back(
+                lambda user: self.save_batched(sheet, user, options['batch_size']))),
+        ]
+
+        for name, seconds in results:
+            self.stdout.write('{:<12} {:>8.2f}s {:>10.0f} rows/s'.format(
+                name, seconds, rows / seconds))
+
+        self.stdout.write('Batched import is {:.1f}x faster'.format(
+            results[0][1] / results[1][1]))
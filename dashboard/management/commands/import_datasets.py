@@ -0,0 +1,174 @@
+"""
+Import a directory of question spreadsheets as submitted datasets.
+
+Each file is handled by its own worker process, which validates the
+sheet the same way the submit page does and, if it is valid, saves it
+with an IngestionJob through the same path as uploads from the
+dashboard. Parsing and validation run on every worker at once, while
+a semaphore shared by the workers limits how many of them write to the
+database at the same time.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+
+from dashboard.ingestion import run_job
+from dashboard.models import IngestionJob
+from dashboard.spreadsheets import read_sheet
+from dashboard.validation import TEMPLATE_ERRORS_KEY, new_sheet_validator
+from sawaliram_auth.models import User
+
+SHEET_EXTENSIONS = ('.xlsx', '.csv')
+
+# set in each worker by init_worker()
+write_slots = None
+
+
+def init_worker(slots):
+    global write_slots
+    write_slots = slots
+
+    # a no-op when the worker was forked from the command's process
+    django.setup()
+
+
+def import_file(path, user_id):
+    """
+    Validate and save one sheet, returning a summary of the outcome
+    """
+    start = time.perf_counter()
+    summary = {
+        'file': os.path.basename(path),
+        'status': 'invalid',
+        'rows': 0,
+        'errors': [],
+    }
+
+    chunks = read_sheet(path)
+    first_chunk = next(chunks)
+    template_errors = new_sheet_validator.check_columns(first_chunk.columns)
+    if template_errors:
+        summary['errors'] = ['{} {}'.format(TEMPLATE_ERRORS_KEY, error)
+            for error in template_errors]
+    else:
+        row_errors = new_sheet_validator.check_rows([first_chunk, *chunks])
+        summary['errors'] = ['{}: {}'.format(row, ' '.join(messages))
+            for row, messages in row_errors.items()]
+
+    if not summary['errors']:
+        with write_slots:
+            job = IngestionJob.objects.create(
+                kind=IngestionJob.KIND_QUESTIONS,
+                file_path=path,
+                file_name=summary['file'],
+                submitted_by_id=user_id)
+            try:
+                run_job(job)
+            except Exception:
+                # run_job() has recorded the failure on the job
+                pass
+
+        summary['status'] = job.status
+        summary['rows'] = job.processed_rows
+        summary['errors'] = job.errors
+        summary['dataset'] = job.dataset_id
+
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+class Command(BaseCommand):
+    help = "Imports every xlsx and csv file in a directory as a submitted dataset"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory',
+            help='Directory containing the spreadsheets')
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Email address of the user to record as the submitter')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Number of files to parse and validate at the same time')
+        parser.add_argument(
+            '--db-writers',
+            type=int,
+            default=2,
+            help='Number of files to write to the database at the same time')
+
+    def find_sheets(self, directory):
+        if not os.path.isdir(directory):
+            raise CommandError('{} is not a directory'.format(directory))
+
+        return sorted(
+            entry.path for entry in os.scandir(directory)
+            if entry.is_file()
+                and os.path.splitext(entry.name)[1].lower() in SHEET_EXTENSIONS
+                # lock files left behind by Excel
+                and not entry.name.startswith('~$'))
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError('There is no user with the email address {}'.format(options['user']))
+
+        paths = self.find_sheets(options['directory'])
+        if not paths:
+            self.stdout.write('No spreadsheets found')
+            return
+
+        # forked workers must not share this process's connections
+        connections.close_all()
+
+        context = multiprocessing.get_context()
+        slots = context.BoundedSemaphore(max(options['db_writers'], 1))
+        results = []
+
+        with ProcessPoolExecutor(
+                max_workers=max(options['workers'] or 1, 1),
+                mp_context=context,
+                initializer=init_worker,
+                initargs=(slots,)) as executor:
+            futures = {
+                executor.submit(import_file, path, user.id): path
+                for path in paths
+            }
+            for future in as_completed(futures):
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    summary = {
+                        'file': os.path.basename(futures[future]),
+                        'status': 'failed',
+                        'rows': 0,
+                        'errors': [str(e)],
+                        'seconds': 0,
+                    }
+                results.append(summary)
+                self.write_summary(summary)
+
+        imported = [r for r in results if r['status'] == IngestionJob.STATUS_DONE]
+        self.stdout.write('Imported {} questions from {} of {} files'.format(
+            sum(r['rows'] for r in imported), len(imported), len(results)))
+
+    def write_summary(self, summary):
+        line = '{file}: {status}, {rows} rows in {seconds:.2f}s'.format(**summary)
+        if summary.get('dataset'):
+            line += ' (dataset {})'.format(summary['dataset'])
+
+        if summary['status'] == IngestionJob.STATUS_DONE:
+            self.stdout.write(self.style.SUCCESS(line))
+        else:
+            self.stdout.write(self.style.ERROR(line))
+
+        for error in summary['errors']:
+            self.stdout.write('    ' + error)
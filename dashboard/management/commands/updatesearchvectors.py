@@ -0,0 +1,51 @@
+"""
+Recompute the stored full-text search vectors.
+
+The vectors are normally maintained by database triggers; this is only
+needed after adding the column to existing data or after changing the
+weights in the trigger function.
+"""
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from dashboard.models import Article, Question
+
+
+class Command(BaseCommand):
+    help = "Recomputes the full-text search vectors of questions and articles"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows to update per transaction')
+
+    def backfill(self, model, batch_size):
+        """
+        Touch search_vector in ID ranges so the trigger recomputes it,
+        keeping each transaction (and its row locks) small.
+        """
+        bounds = model.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            return 0
+
+        updated = 0
+        start = bounds['first']
+        while start <= bounds['last']:
+            end = start + batch_size
+            with transaction.atomic():
+                updated += (model.objects
+                    .filter(pk__gte=start, pk__lt=end)
+                    .update(search_vector=None))
+            start = end
+
+        return updated
+
+    def handle(self, *args, **options):
+        updated = self.backfill(Question, options['batch_size'])
+        self.stdout.write('Updated search vectors for {} questions'.format(updated))
+
+        updated = self.backfill(Article, options['batch_size'])
+        self.stdout.write('Updated search vectors for {} articles'.format(updated))
@@ -0,0 +1,55 @@
+# Generated by Django 4.2 on 2026-10-18 10:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Keep the weights in sync with dashboard.search.QUESTION_SEARCH_WEIGHTS
+CREATE_TRIGGER = '''
+CREATE OR REPLACE FUNCTION question_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.question_text, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.question_text_english, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.school, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.area, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.state, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.field_of_interest, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(NEW.published_source, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER question_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF
+        question_text, question_text_english, school, area, state,
+        field_of_interest, published_source, search_vector
+    ON question
+    FOR EACH ROW EXECUTE FUNCTION question_search_vector_update();
+'''
+
+DROP_TRIGGER = '''
+DROP TRIGGER IF EXISTS question_search_vector_trigger ON question;
+DROP FUNCTION IF EXISTS question_search_vector_update();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0038_draftanswertranslation_draftarticletranslation_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='question_search_vector_idx'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2 on 2026-10-18 11:03
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+# Weights: titles A, bodies C. Only published articles (status = 1)
+# get a vector, and the text of their published translations is folded
+# into it so searches in any language stay on the index.
+CREATE_TRIGGERS = '''
+CREATE OR REPLACE FUNCTION article_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF NEW.status <> 1 THEN
+        NEW.search_vector := NULL;
+        RETURN NEW;
+    END IF;
+
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.body, '')), 'C') ||
+        coalesce((
+            SELECT
+                setweight(to_tsvector('english', string_agg(coalesce(t.title, ''), ' ')), 'A') ||
+                setweight(to_tsvector('english', string_agg(coalesce(t.body, ''), ' ')), 'C')
+            FROM dashboard_articletranslation t
+            WHERE t.source_id = NEW.id AND t.status = 1
+        ), ''::tsvector);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER article_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, body, status, search_vector
+    ON articles
+    FOR EACH ROW EXECUTE FUNCTION article_search_vector_update();
+
+CREATE OR REPLACE FUNCTION article_translation_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE articles SET search_vector = NULL WHERE id = OLD.source_id;
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.source_id <> OLD.source_id) THEN
+        UPDATE articles SET search_vector = NULL WHERE id = NEW.source_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER article_translation_search_vector_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF title, body, status, source_id
+    ON dashboard_articletranslation
+    FOR EACH ROW EXECUTE FUNCTION article_translation_search_vector_update();
+'''
+
+DROP_TRIGGERS = '''
+DROP TRIGGER IF EXISTS article_translation_search_vector_trigger ON dashboard_articletranslation;
+DROP FUNCTION IF EXISTS article_translation_search_vector_update();
+DROP TRIGGER IF EXISTS article_search_vector_trigger ON articles;
+DROP FUNCTION IF EXISTS article_search_vector_update();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0039_question_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('status', 1)), fields=['search_vector'], name='article_search_vector_idx'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        # Fill in the vectors of articles that are already published
+        migrations.RunSQL(
+            'UPDATE articles SET search_vector = NULL WHERE status = 1;',
+            migrations.RunSQL.noop),
+    ]
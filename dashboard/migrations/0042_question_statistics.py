@@ -0,0 +1,72 @@
+# Generated by Django 4.2 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+# One row per combination of the analytics dimensions. The id is only
+# there to give Django a primary key and REFRESH ... CONCURRENTLY the
+# unique index it needs; it is numbered in a fixed order so that rows
+# keep their ids between refreshes unless the groups change.
+CREATE_VIEW = '''
+CREATE MATERIALIZED VIEW question_statistics AS
+SELECT
+    row_number() OVER (ORDER BY
+        language, student_gender, field_of_interest, state,
+        student_class, question_format, curriculum_followed, context,
+        medium_language, year_asked) AS id,
+    grouped.*
+FROM (
+    SELECT
+        language,
+        student_gender,
+        field_of_interest,
+        state,
+        student_class,
+        question_format,
+        curriculum_followed,
+        context,
+        medium_language,
+        EXTRACT(YEAR FROM question_asked_on)::integer AS year_asked,
+        COUNT(*)::integer AS question_count
+    FROM question
+    GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9, 10
+) AS grouped;
+
+CREATE UNIQUE INDEX question_statistics_id_idx ON question_statistics (id);
+'''
+
+DROP_VIEW = '''
+DROP MATERIALIZED VIEW IF EXISTS question_statistics;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0041_comment_target_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStatistics',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('language', models.CharField(max_length=100)),
+                ('student_gender', models.CharField(max_length=100)),
+                ('field_of_interest', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=100)),
+                ('student_class', models.CharField(max_length=100)),
+                ('question_format', models.CharField(max_length=100)),
+                ('curriculum_followed', models.CharField(max_length=100)),
+                ('context', models.CharField(max_length=100)),
+                ('medium_language', models.CharField(max_length=100)),
+                ('year_asked', models.IntegerField(null=True)),
+                ('question_count', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'question_statistics',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(CREATE_VIEW, DROP_VIEW),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2 on 2026-10-18 16:30
+
+import hashlib
+import unicodedata
+
+from django.db import migrations, models
+
+
+def make_content_hash(question_text, language, school):
+    # a copy of dashboard.models.make_content_hash as it was when this
+    # migration was written
+    parts = []
+    for value in (question_text, language, school):
+        value = unicodedata.normalize('NFKC', str(value or ''))
+        parts.append(' '.join(value.casefold().split()))
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def backfill_content_hashes(apps, schema_editor):
+    for model_name in ['QuestionArchive', 'Question']:
+        model = apps.get_model('dashboard', model_name)
+
+        batch = []
+        for obj in (model.objects
+                .only('id', 'question_text', 'language', 'school')
+                .iterator(chunk_size=2000)):
+            obj.content_hash = make_content_hash(
+                obj.question_text, obj.language, obj.school)
+            batch.append(obj)
+
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['content_hash'])
+                batch = []
+
+        if batch:
+            model.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0043_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionarchive',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_content_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0044_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['updated_on', 'id'], name='question_updated_on_id_idx'),
+        ),
+        migrations.CreateModel(
+            name='QuestionTombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_id', models.IntegerField()),
+                ('deleted_on', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'question_tombstone',
+                'indexes': [models.Index(fields=['deleted_on', 'id'], name='question_tombstone_deleted_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExportCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_updated_on', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.IntegerField(default=0)),
+                ('last_deleted_on', models.DateTimeField(blank=True, null=True)),
+                ('last_tombstone_id', models.IntegerField(default=0)),
+                ('exported_on', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'export_checkpoint',
+            },
+        ),
+    ]
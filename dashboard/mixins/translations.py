@@ -1,6 +1,8 @@
 import warnings
 
 from django.db import models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.apps import apps
 from django.core.exceptions import ImproperlyConfigured
@@ -30,6 +32,86 @@ class TranslationMixin(models.Model):
     def translator(self):
         return self.translated_by
 
+def prefetch_translations(objects, language):
+    '''
+    Does set_language(language) for a list of objects of one
+    translatable model, fetching all their translations in a single
+    query rather than one per object. Objects already in the language
+    are left alone, as are objects without a translation in it.
+    '''
+
+    objects = [obj for obj in objects if obj.language != language]
+    if not language or not objects:
+        return
+
+    translation_model = apps.get_model(objects[0].translation_model)
+    translations = {}
+    for translation in (translation_model.objects
+            .filter(
+                source__in=[obj.pk for obj in objects],
+                language=language)
+            .order_by('-id')):
+        # ordered so the oldest translation wins, if there are several
+        translations[translation.source_id] = translation
+
+    for obj in objects:
+        if obj.pk in translations:
+            obj.translation = translations[obj.pk]
+
+class TranslatableQuerySet(models.QuerySet):
+    '''
+    QuerySet for translatable models, which can set the language of
+    all the objects it fetches at once: `prefetch_translations(lang)`
+    does the same as calling set_language(lang) on each of them, in
+    one query, and `annotate_translations(lang)` works out their tr_
+    values in the database instead.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._translation_language = None
+        self._translations_done = False
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._translation_language = self._translation_language
+        return clone
+
+    def prefetch_translations(self, language):
+        clone = self._chain()
+        clone._translation_language = language
+        return clone
+
+    def annotate_translations(self, language):
+        '''
+        Annotates the objects with a tr_<field> column for each
+        translatable field, holding the field's value in the object's
+        published translation to the given language if it has one,
+        and the field's own value otherwise. Unlike the tr_ properties,
+        these columns can be filtered, ordered and searched on in the
+        database.
+        '''
+
+        translations = (apps.get_model(self.model.translation_model).objects
+            .filter(source=OuterRef('pk'), language=language)
+            .order_by('id'))
+
+        return self.annotate(**{
+            'tr_{}'.format(field): Coalesce(
+                Subquery(translations.values(field)[:1]),
+                F(field),
+                output_field=self.model._meta.get_field(field))
+            for field in self.model.translatable_fields
+        })
+
+    def _fetch_all(self):
+        super()._fetch_all()
+        if self._translation_language and not self._translations_done:
+            # values() and values_list() results have no translations
+            if issubclass(self._iterable_class, models.query.ModelIterable):
+                prefetch_translations(self._result_cache, self._translation_language)
+            self._translations_done = True
+
 def translatable(cls):
     '''
     Takes a model and makes it translatable by setting values and
@@ -147,25 +229,7 @@ def translatable(cls):
         moment :P
         '''
 
-        # If we're already the correct language, do nothing
-        if language == self.language:
-            return
-
-        # search for translations with the given language
-        t = apps.get_model(self.translation_model).objects.filter(
-            source=self,
-            language=language,
-        )
-
-        # if it's there, set that to the translation
-        if t.count() > 0:
-            # TODO: warn if more than one translation per language
-
-            # set the result as a translation
-            self.translation = t[0]
-
-        # if it's not there, do nothing
-        # we'll fall back to using our default values
+        prefetch_translations([self], language)
 
     cls.set_language = set_language
 
@@ -235,15 +299,28 @@ def translatable(cls):
         `self.hello` otherwise. Of course, we assume you do the sensible
         thing and actually define properties called 'hello' on your
         models before trying to access them.
+
+        The property can also be set, which is how the values of
+        annotate_translations() end up on the object; a translation
+        set by set_language() still takes precedence over them.
         '''
 
+        name = 'tr_{}'.format(field)
+
         @property
         def tr_field(self):
             if self.translation:
                 return getattr(self.translation, field)
+            elif name in self.__dict__:
+                # annotated by TranslatableQuerySet.annotate_translations()
+                return self.__dict__[name]
             else:
                 return getattr(self, field)
 
+        @tr_field.setter
+        def tr_field(self, value):
+            self.__dict__[name] = value
+
         return tr_field
 
     for field in cls.translatable_fields:
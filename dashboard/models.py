@@ -1,12 +1,17 @@
 """Define the data models for all Sawaliram content"""
 
 import datetime
-from django.db import models
+import hashlib
+import unicodedata
+from django.db import connection, models, transaction
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.http import urlencode
 
 from django.utils.text import slugify
 from django.utils.translation import get_language_info
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 from dashboard.mixins.draftables import (
     DraftableModel,
@@ -15,6 +20,7 @@ from dashboard.mixins.draftables import (
     DraftDraftableManager,
 )
 from dashboard.mixins.translations import (
+    TranslatableQuerySet,
     TranslationMixin,
     translatable,
 )
@@ -37,6 +43,50 @@ LANGUAGE_CODES = {
 }
 
 
+def make_content_hash(question_text, language, school):
+    """
+    Return a hash that is the same for questions that only differ in
+    Unicode representation, case or whitespace, used to find questions
+    that have been submitted before
+    """
+
+    parts = []
+    for value in (question_text, language, school):
+        value = unicodedata.normalize('NFKC', str(value or ''))
+        parts.append(' '.join(value.casefold().split()))
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class ContentHashMixin(models.Model):
+    """
+    Keep a content_hash of the question text, language and school
+    (see make_content_hash), indexed for finding duplicates
+    """
+
+    CONTENT_HASH_FIELDS = ['question_text', 'language', 'school']
+
+    class Meta:
+        abstract = True
+
+    content_hash = models.CharField(
+        max_length=64,
+        default='',
+        blank=True,
+        editable=False,
+        db_index=True)
+
+    def update_content_hash(self):
+        self.content_hash = make_content_hash(
+            self.question_text, self.language, self.school)
+
+    def save(self, *args, **kwargs):
+        self.update_content_hash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content_hash' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['content_hash']
+        super().save(*args, **kwargs)
+
+
 class Dataset(models.Model):
     """Define the data model for submitted datasets"""
 
@@ -53,7 +103,7 @@ class Dataset(models.Model):
         return 'Dataset #{}'.format(self.id)
 
 
-class QuestionArchive(models.Model):
+class QuestionArchive(ContentHashMixin):
     """Define the data model for raw submissions by volunteers"""
 
     class Meta:
@@ -93,6 +143,31 @@ class QuestionArchive(models.Model):
         else:
             return self.question_text_english
 
+    # Fields that are copied as they are when a question is accepted
+    ACCEPTED_FIELDS = [
+        'school',
+        'area',
+        'state',
+        'student_name',
+        'student_gender',
+        'student_class',
+        'question_text',
+        'question_text_english',
+        'question_format',
+        'language',
+        'contributor',
+        'contributor_role',
+        'context',
+        'medium_language',
+        'curriculum_followed',
+        'published',
+        'published_source',
+        'published_date',
+        'question_asked_on',
+        'notes',
+        'content_hash',
+    ]
+
     def accept_question(self, acceptor):
         """
         Mark a question as approved, by the given acceptor (user).
@@ -102,47 +177,98 @@ class QuestionArchive(models.Model):
         a Question one.
         """
 
-        q = Question()
-        q.school = self.school
-        q.area = self.area
-        q.state = self.state
-        q.student_name = self.student_name
-        q.student_gender = self.student_gender
-        q.student_class = self.student_class
-        q.question_text = self.question_text
-        q.question_text_english = self.question_text_english
-        q.question_format = self.question_format
-        q.language = self.language
-        q.contributor = self.contributor
-        q.contributor_role = self.contributor_role
-        q.context = self.context
-        q.medium_language = self.medium_language
-        q.curriculum_followed = self.curriculum_followed
-        q.published = self.published
-        q.published_source = self.published_source
-        q.published_date = self.published_date
-        q.question_asked_on = self.question_asked_on
-        q.notes = self.notes
-        q.created_on = self.created_on
-        q.updated_on = self.updated_on
-        q.submitted_by = self.submitted_by
-        q.curated_by = acceptor
-        try:
-            q.save()
-            self.delete()
-        except Exception as e:
-            print('Error accepting question: %s' % e)
+        return QuestionArchive.accept_questions([self.id], acceptor)
+
+    @classmethod
+    def accept_questions(cls, ids, acceptor):
+        """
+        Accept the archived questions with the given ids in bulk, by the
+        given acceptor (user).
+
+        The archive rows are deleted and the questions inserted in one
+        statement, so either all of them are moved or none are. Returns
+        a dict with the archive ids that were moved ('moved'), the ids
+        of the new questions ('questions') and the requested ids that
+        were not found in the archive ('failed').
+        """
+
+        ids = sorted(set(int(pk) for pk in ids))
+        if not ids:
+            return {'moved': [], 'questions': [], 'failed': []}
+
+        quote = connection.ops.quote_name
+        columns, expressions, params = [], [], [ids]
+        for field in Question._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            columns.append(quote(field.column))
+
+            if field.name in cls.ACCEPTED_FIELDS:
+                expressions.append('moved.' + quote(field.column))
+            elif field.name == 'curated_by':
+                expressions.append('%s')
+                params.append(acceptor.pk)
+            elif field.name in ('created_on', 'updated_on'):
+                expressions.append('NOW()')
+            else:
+                expressions.append('%s')
+                params.append(field.get_db_prep_save(field.get_default(), connection))
+
+        sql = """
+            WITH moved AS (
+                DELETE FROM {archive} WHERE id = ANY(%s) RETURNING *
+            ), inserted AS (
+                INSERT INTO {question} ({columns})
+                SELECT {expressions} FROM moved ORDER BY moved.id
+                RETURNING id
+            )
+            SELECT
+                ARRAY(SELECT id FROM moved ORDER BY id),
+                ARRAY(SELECT id FROM inserted ORDER BY id)
+        """.format(
+            archive=quote(cls._meta.db_table),
+            question=quote(Question._meta.db_table),
+            columns=', '.join(columns),
+            expressions=', '.join(expressions),
+        )
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                moved, questions = cursor.fetchone()
+
+        if questions:
+            # the questions were inserted without going through save(),
+            # so no signal has told search about them
+            from dashboard.search import bump_generation
+            bump_generation()
+
+        return {
+            'moved': moved,
+            'questions': questions,
+            'failed': sorted(set(ids) - set(moved)),
+        }
 
     def __str__(self):
         return 'Q{} (uncurated): {}'.format(self.id, self.question_text)
 
 
 @translatable
-class Question(models.Model):
+class Question(ContentHashMixin):
     """Define the data model for questions curated by admins."""
 
     class Meta:
         db_table = 'question'
+        indexes = [
+            GinIndex(
+                fields=['search_vector'],
+                name='question_search_vector_idx'),
+            models.Index(
+                fields=['updated_on', 'id'],
+                name='question_updated_on_id_idx'),
+        ]
+
+    objects = TranslatableQuerySet.as_manager()
 
     translation_model = 'dashboard.PublishedTranslatedQuestion'
     translatable_fields = [
@@ -200,15 +326,58 @@ class Question(models.Model):
     urban_or_rural = models.CharField(max_length=100, default='', blank=True)
     type_of_school = models.CharField(max_length=100, default='', blank=True)
     comments_on_coding_rationale = models.CharField(max_length=500, default='', blank=True)
+    # maintained by the question_search_vector_update trigger
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return 'Q{}: {}'.format(self.id, self.question_text)
 
 
+class QuestionStatistics(models.Model):
+    """
+    Number of questions for every combination of the dimensions shown
+    on the analytics page. Backed by the question_statistics
+    materialized view (see migration 0042), which is refreshed
+    periodically by the refresh_question_statistics task.
+    """
+
+    DIMENSIONS = [
+        'language',
+        'student_gender',
+        'field_of_interest',
+        'state',
+        'student_class',
+        'question_format',
+        'curriculum_followed',
+        'context',
+        'medium_language',
+        'year_asked',
+    ]
+
+    class Meta:
+        managed = False
+        db_table = 'question_statistics'
+
+    id = models.BigIntegerField(primary_key=True)
+    language = models.CharField(max_length=100)
+    student_gender = models.CharField(max_length=100)
+    field_of_interest = models.CharField(max_length=100)
+    state = models.CharField(max_length=100)
+    student_class = models.CharField(max_length=100)
+    question_format = models.CharField(max_length=100)
+    curriculum_followed = models.CharField(max_length=100)
+    context = models.CharField(max_length=100)
+    medium_language = models.CharField(max_length=100)
+    year_asked = models.IntegerField(null=True)
+    question_count = models.IntegerField()
+
+
 @translatable
 class Answer(models.Model):
     """Define the data model for answers in English"""
 
+    objects = TranslatableQuerySet.as_manager()
+
     translation_model = 'dashboard.PublishedAnswerTranslation'
     translatable_fields = ['answer_text']
 
@@ -573,6 +742,126 @@ class UnencodedSubmission(models.Model):
     updated_on = models.DateTimeField(auto_now=True)
 
 
+class IngestionJob(models.Model):
+    """
+    Define the data model for spreadsheet uploads that are being saved
+    in the background by the ingest_dataset task
+    """
+
+    KIND_QUESTIONS = 'questions'
+    KIND_CURATED = 'curated'
+    KIND_ENCODED = 'encoded'
+    KIND_CHOICES = [
+        (KIND_QUESTIONS, 'Submitted questions'),
+        (KIND_CURATED, 'Curated dataset'),
+        (KIND_ENCODED, 'Encoded dataset'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    class Meta:
+        db_table = 'ingestion_job'
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING)
+    file_path = models.CharField(max_length=500)
+    file_name = models.CharField(max_length=255, blank=True)
+    total_rows = models.IntegerField(null=True, blank=True)
+    processed_rows = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    dataset = models.ForeignKey(
+        'Dataset',
+        related_name='ingestion_jobs',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True)
+    submitted_by = models.ForeignKey(
+        'sawaliram_auth.User',
+        related_name='ingestion_jobs',
+        on_delete=models.CASCADE)
+    created_on = models.DateTimeField(auto_now_add=True)
+    updated_on = models.DateTimeField(auto_now=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return 'Ingestion job #{} ({})'.format(self.id, self.kind)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    def get_progress_cache_key(self):
+        return 'ingestion_job_progress:{}'.format(self.id)
+
+    def set_progress(self, processed_rows):
+        """
+        Record how many rows have been processed so far. This goes to
+        the cache rather than the database, since the rows themselves
+        are written in a transaction that only commits at the end.
+        """
+        cache.set(self.get_progress_cache_key(), processed_rows, 60 * 60)
+
+    def get_progress(self):
+        """Return the number of rows processed so far"""
+        if self.status == self.STATUS_RUNNING:
+            return cache.get(self.get_progress_cache_key(), self.processed_rows)
+        return self.processed_rows
+
+
+class QuestionTombstone(models.Model):
+    """
+    Define the data model to record deleted questions, so incremental
+    exports can remove them from their copies
+    """
+
+    class Meta:
+        db_table = 'question_tombstone'
+        indexes = [
+            models.Index(
+                fields=['deleted_on', 'id'],
+                name='question_tombstone_deleted_idx'),
+        ]
+
+    question_id = models.IntegerField()
+    deleted_on = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return 'Deleted question #{}'.format(self.question_id)
+
+
+class ExportCheckpoint(models.Model):
+    """
+    Define the data model for how far an incremental export has got:
+    the (updated_on, id) of the last question and the (deleted_on, id)
+    of the last tombstone it included
+    """
+
+    class Meta:
+        db_table = 'export_checkpoint'
+
+    name = models.CharField(max_length=50, unique=True)
+    last_updated_on = models.DateTimeField(null=True, blank=True)
+    last_id = models.IntegerField(default=0)
+    last_deleted_on = models.DateTimeField(null=True, blank=True)
+    last_tombstone_id = models.IntegerField(default=0)
+    exported_on = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return 'Export checkpoint {}'.format(self.name)
+
+
 class TranslatedQuestion(DraftableModel, TranslationMixin):
     """Define the data model to store translated questions"""
 
@@ -650,6 +939,8 @@ class Article(DraftableModel):
     returning results).
     '''
 
+    objects = TranslatableQuerySet.as_manager()
+
     translation_model = 'dashboard.PublishedArticleTranslation'
     translatable_fields = ['title', 'body']
 
@@ -685,8 +976,18 @@ class Article(DraftableModel):
 
     comments = GenericRelation('dashboard.Comment')
 
+    # maintained by the article_search_vector_update trigger; only set
+    # for published articles, and includes published translations
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         db_table = 'articles'
+        indexes = [
+            GinIndex(
+                fields=['search_vector'],
+                name='article_search_vector_idx',
+                condition=models.Q(status=DraftableModel.STATUS_PUBLISHED)),
+        ]
 
 
     def get_slug(self):
@@ -735,7 +1036,7 @@ class SubmittedArticle(Article.get_submitted_model(), Article):
         })
 
 class PublishedArticle(Article.get_published_model(), Article):
-    objects = PublishedDraftableManager()
+    objects = PublishedDraftableManager.from_queryset(TranslatableQuerySet)()
     class Meta:
         proxy = True
 
@@ -744,6 +1045,14 @@ class Comment(models.Model):
     Generic class for comments on any kind of model 🎉
     '''
 
+    class Meta:
+        indexes = [
+            # for looking up (and counting) the comments on an object
+            models.Index(
+                fields=['content_type', 'object_id'],
+                name='comment_target_idx'),
+        ]
+
     # Main field
     text = models.TextField()
 
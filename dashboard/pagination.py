@@ -0,0 +1,262 @@
+'''
+Keyset ("cursor") pagination and approximate counts.
+
+Paginating with OFFSET makes the database produce and throw away every
+row before the requested page, so deep pages get slower and slower.
+CursorPaginator instead remembers the sort key values of the first and
+last rows of a page in an opaque token, and fetches the next page with
+a `WHERE (sort keys) > (last row's sort keys)` condition that can be
+answered from an index no matter how deep the page is.
+'''
+
+import base64
+import datetime
+import decimal
+import json
+
+from django.db import connection
+from django.db.models import F, Q
+
+# Below this many (estimated) rows it is cheap enough to count exactly
+APPROXIMATE_COUNT_THRESHOLD = 10000
+
+
+def encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        # isoformat() keeps microseconds, which the keyset comparison
+        # relies on to find the exact row again
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+class CursorPage:
+    '''
+    One page of results. Mirrors the parts of django.core.paginator.Page
+    used in templates, with next_cursor and previous_cursor tokens in
+    place of page numbers (None when there is no such page).
+    '''
+
+    def __init__(self, object_list, number, paginator,
+        next_cursor=None, previous_cursor=None):
+
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Page {}>'.format(self.number)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class CursorPaginator:
+    '''
+    Paginates a queryset by its sort keys.
+
+    `ordering` defaults to the queryset's own ordering and may name
+    fields, related fields or annotations (such as a search rank). The
+    primary key is added as a final tie-breaker, so every row has a
+    unique position. Sort keys must not be NULL; order by a Coalesce()
+    annotation when a field is nullable.
+
+    `count` may be given when the number of results is already known
+    (or estimated); otherwise it is counted when first asked for.
+    '''
+
+    def __init__(self, queryset, per_page, ordering=None, count=None):
+        ordering = list(ordering or queryset.query.order_by or ['pk'])
+        if not any(name.lstrip('-') in ('pk', 'id') for name in ordering):
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+
+        # Each sort key is annotated under a name of its own, so that
+        # its value can be read off the result rows and compared
+        # against in the keyset condition
+        self.keys = []
+        annotations = {}
+        for i, name in enumerate(ordering):
+            alias = 'cursor_key_{}'.format(i)
+            annotations[alias] = F(name.lstrip('-'))
+            self.keys.append((alias, name.startswith('-')))
+
+        self.queryset = queryset.annotate(**annotations)
+        self.per_page = per_page
+        self._count = count
+
+    @property
+    def count(self):
+        if self._count is None:
+            self._count = self.queryset.count()
+        return self._count
+
+    @property
+    def num_pages(self):
+        if not self.count:
+            return 1
+        return (self.count + self.per_page - 1) // self.per_page
+
+    def make_cursor(self, obj, number, forward):
+        data = {
+            'v': [encode_value(getattr(obj, alias)) for alias, _ in self.keys],
+            'n': number,
+            'f': forward,
+        }
+        token = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(token).decode('ascii').rstrip('=')
+
+    def parse_cursor(self, cursor):
+        '''
+        Returns the decoded cursor, or None if it is missing or
+        doesn't fit this paginator (in which case the first page is
+        shown)
+        '''
+
+        if not cursor:
+            return None
+
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(cursor + padding))
+            values, number, forward = data['v'], int(data['n']), bool(data['f'])
+        except (ValueError, TypeError, KeyError):
+            return None
+
+        if len(values) != len(self.keys) or number < 1:
+            return None
+        return values, number, forward
+
+    def get_ordering(self, forward):
+        ordering = []
+        for alias, descending in self.keys:
+            if descending == forward:
+                ordering.append('-' + alias)
+            else:
+                ordering.append(alias)
+        return ordering
+
+    def get_keyset_condition(self, values, forward):
+        '''
+        Returns the condition for rows that come after (or, going
+        backwards, before) the row with the given sort key values
+        '''
+
+        condition = Q()
+        equal = Q()
+        for (alias, descending), value in zip(self.keys, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{alias + '__' + lookup: value})
+            equal &= Q(**{alias: value})
+
+        # Also bound the first key on its own, which lets the database
+        # use a range scan on an index over it
+        first_alias, descending = self.keys[0]
+        lookup = 'lte' if descending == forward else 'gte'
+        return Q(**{first_alias + '__' + lookup: values[0]}) & condition
+
+    def get_page(self, cursor=None):
+        position = self.parse_cursor(cursor)
+
+        if position is None:
+            number = 1
+            rows = list(self.queryset.order_by(
+                *self.get_ordering(True))[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            has_previous = False
+            rows = rows[:self.per_page]
+        else:
+            values, number, forward = position
+            rows = list(self.queryset
+                .filter(self.get_keyset_condition(values, forward))
+                .order_by(*self.get_ordering(forward))[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+
+            if forward:
+                has_next = has_more
+                has_previous = True
+            else:
+                rows.reverse()
+                has_next = True
+                has_previous = has_more and number > 1
+
+        next_cursor = None
+        if has_next and rows:
+            next_cursor = self.make_cursor(rows[-1], number + 1, forward=True)
+
+        previous_cursor = None
+        if has_previous and rows:
+            previous_cursor = self.make_cursor(rows[0], number - 1, forward=False)
+
+        return CursorPage(rows, number, self, next_cursor, previous_cursor)
+
+
+def estimate_count(queryset):
+    '''
+    Returns the database's estimate of the number of rows in the
+    queryset, without counting them: the table statistics in
+    pg_class for unfiltered querysets, the query planner's estimate
+    otherwise
+    '''
+
+    if not queryset.query.where and not queryset.query.distinct:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+
+        # reltuples is -1 until the table has been analyzed
+        if row and row[0] >= 0:
+            return int(row[0])
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def approximate_count(queryset, threshold=APPROXIMATE_COUNT_THRESHOLD):
+    '''
+    Returns a tuple (count, exact). Results that are estimated to be
+    smaller than the threshold are counted exactly; larger ones return
+    the estimate.
+    '''
+
+    if queryset.query.is_empty():
+        return 0, True
+
+    estimate = estimate_count(queryset)
+    if estimate < threshold:
+        return queryset.count(), True
+    return estimate, False
@@ -0,0 +1,31 @@
+'''
+Search over questions and articles.
+
+`vectors` holds the full-text matching and ranking against the stored
+search vectors; `compiler` builds complete search listings out of it
+and `facets` computes the filter values shown next to them. `cache`
+keys cached search data on a generation that content changes bump.
+'''
+
+from dashboard.search.vectors import (
+    SEARCH_CONFIG,
+    QUESTION_SEARCH_WEIGHTS,
+    make_search_query,
+    search_questions,
+    search_articles,
+)
+from dashboard.search.compiler import (
+    SearchParams,
+    SearchCompiler,
+    has_published_answer,
+)
+from dashboard.search.facets import (
+    compute_facets,
+    get_facets,
+)
+from dashboard.search.cache import (
+    SEARCH_CACHE_TIMEOUT,
+    bump_generation,
+    get_generation,
+    get_results_cache_key,
+)
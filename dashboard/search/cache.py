@@ -0,0 +1,85 @@
+'''
+Versioned caching of search results.
+
+Cached search data is keyed on a generation number as well as on the
+search itself. Any change to searchable content bumps the generation
+(see dashboard.signals), which makes every earlier entry unreachable at
+once; memcached then evicts them in its own time. This avoids having to
+work out which of the many cached searches a change could affect.
+'''
+
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+
+SEARCH_GENERATION_KEY = 'search_generation'
+
+# How long (in seconds) to keep cached search results. Changes to the
+# content invalidate them anyway; this only limits how long unpopular
+# searches take up space.
+SEARCH_CACHE_TIMEOUT = 60 * 60
+
+
+def get_generation():
+    '''
+    Returns the current search generation
+    '''
+
+    generation = cache.get(SEARCH_GENERATION_KEY)
+    if generation is None:
+        # Start from the clock rather than from 1, so that a counter
+        # that was evicted never comes back at a value it had before
+        cache.add(SEARCH_GENERATION_KEY, int(time.time()), None)
+        generation = cache.get(SEARCH_GENERATION_KEY, 0)
+    return generation
+
+
+def bump_generation():
+    '''
+    Invalidates all cached search data
+    '''
+
+    try:
+        cache.incr(SEARCH_GENERATION_KEY)
+    except ValueError:
+        # the counter isn't set (yet), so nothing has been cached
+        # under it either
+        get_generation()
+
+
+def normalize_text(text):
+    return ' '.join(text.lower().split())
+
+
+def make_cache_key(prefix, data):
+    '''
+    Returns a cache key for the given JSON-serializable data under the
+    current generation
+    '''
+
+    data = json.dumps(data, sort_keys=True)
+    digest = hashlib.sha1(data.encode('utf-8')).hexdigest()
+    return '{}:{}:{}'.format(prefix, get_generation(), digest)
+
+
+def get_results_cache_key(params, language, scope=''):
+    '''
+    Returns the cache key for one page of search results
+    '''
+
+    return make_cache_key('search_results', {
+        'scope': scope,
+        'text': normalize_text(params.text),
+        'categories': sorted(params.categories),
+        'question_categories': sorted(params.question_categories),
+        'facets': {
+            name: sorted(values)
+            for name, values in params.facets.items()
+            if values
+        },
+        'sort': params.sort,
+        'cursor': params.cursor or '',
+        'language': language,
+    })
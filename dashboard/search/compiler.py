@@ -0,0 +1,194 @@
+'''
+Compile search requests into querysets.
+
+All the search listings (public search, View Questions, Answer
+Questions, Review Answers and Translate Content) go through the
+SearchCompiler. A view only decides which rows it starts from; the
+compiler adds the text match, the question categories, the facet
+filters and the ordering, so that each content type ends up as a
+single SQL query without joins that would need a DISTINCT.
+'''
+
+import urllib.parse
+
+from django.db.models import Exists, OuterRef
+
+from dashboard.models import Answer, PublishedArticle, Question
+from dashboard.search.vectors import search_articles, search_questions
+
+CONTENT_TYPES = ['questions', 'articles']
+
+# Facet name (as used in the query string) -> model field
+QUESTION_FACETS = {
+    'subject': 'field_of_interest',
+    'state': 'state',
+    'curriculum': 'curriculum_followed',
+    'language': 'language',
+}
+ARTICLE_FACETS = {
+    'language': 'language',
+}
+
+# Sort name -> ordering. Sorts not listed here ('relevance' and
+# 'comments') keep the ordering the queryset already has.
+QUESTION_ORDERINGS = {
+    'newest': ['-created_on'],
+    'oldest': ['created_on'],
+    'date': ['published_date'],
+}
+ARTICLE_ORDERINGS = {
+    'newest': ['-published_on'],
+    'oldest': ['published_on'],
+    'date': ['published_on'],
+}
+
+
+def has_published_answer():
+    '''
+    Returns an expression that is true for questions that have at
+    least one published answer
+    '''
+
+    return Exists(Answer.objects.filter(
+        question_id=OuterRef('pk'),
+        status=Answer.STATUS_PUBLISHED,
+    ))
+
+
+class SearchParams:
+    '''
+    Everything a search listing needs to know about a request: the
+    search text, which content types and question categories to show,
+    the facet filters, the sort order and the page cursor (see
+    dashboard.pagination).
+    '''
+
+    def __init__(self,
+        text='',
+        categories=None,
+        question_categories=None,
+        facets=None,
+        sort='newest',
+        cursor=None):
+
+        self.text = text or ''
+        self.categories = list(categories or ['questions'])
+        self.question_categories = list(question_categories or [])
+        self.facets = facets or {}
+        self.sort = sort
+        self.cursor = cursor
+
+    @classmethod
+    def from_querydict(cls,
+        params,
+        default_sort=None,
+        default_question_categories=None):
+        '''
+        Build the search parameters from a request's GET parameters.
+
+        The defaults apply when the request doesn't specify a sort
+        order or question categories of its own.
+        '''
+
+        text = params.get('q', '')
+
+        if default_sort is None:
+            default_sort = 'relevance' if text else 'newest'
+
+        if 'questions' in params:
+            question_categories = params.getlist('questions')
+        else:
+            question_categories = default_question_categories
+
+        facets = {}
+        for name in QUESTION_FACETS:
+            values = [urllib.parse.unquote(item)
+                for item in params.getlist(name)]
+            if values:
+                facets[name] = values
+
+        return cls(
+            text=text,
+            categories=params.getlist('category'),
+            question_categories=question_categories,
+            facets=facets,
+            sort=params.get('sort-by', default_sort),
+            cursor=params.get('cursor'),
+        )
+
+    def get_facet(self, name):
+        return self.facets.get(name, [])
+
+
+class SearchCompiler:
+    '''
+    Turns SearchParams into one queryset per content type.
+
+    `base_querysets` maps content types ('questions', 'articles') to
+    the querysets to search within. Content types that are missing
+    from it always come out empty.
+    '''
+
+    def __init__(self, base_querysets):
+        self.base_querysets = base_querysets
+
+    def compile(self, params, apply_facets=True):
+        '''
+        Returns a dict with a queryset for each content type.
+
+        With apply_facets=False the facet filters and the ordering are
+        left out; this is the set of rows the facet values are
+        collected from.
+        '''
+
+        return {
+            'questions': self.compile_questions(params, apply_facets),
+            'articles': self.compile_articles(params, apply_facets),
+        }
+
+    def compile_questions(self, params, apply_facets=True):
+        queryset = self.base_querysets.get('questions')
+        if queryset is None or 'questions' not in params.categories:
+            return Question.objects.none()
+
+        if params.text:
+            queryset = search_questions(queryset, params.text)
+
+        # answered and unanswered together is everything
+        categories = set(params.question_categories)
+        if categories == {'answered'}:
+            queryset = queryset.filter(has_published_answer())
+        elif categories == {'unanswered'}:
+            queryset = queryset.filter(~has_published_answer())
+
+        if not apply_facets:
+            return queryset
+
+        queryset = self.filter_facets(queryset, params, QUESTION_FACETS)
+        return self.order(queryset, params, QUESTION_ORDERINGS)
+
+    def compile_articles(self, params, apply_facets=True):
+        queryset = self.base_querysets.get('articles')
+        if queryset is None or 'articles' not in params.categories:
+            return PublishedArticle.objects.none()
+
+        if params.text:
+            queryset = search_articles(queryset, params.text)
+
+        if not apply_facets:
+            return queryset
+
+        queryset = self.filter_facets(queryset, params, ARTICLE_FACETS)
+        return self.order(queryset, params, ARTICLE_ORDERINGS)
+
+    def filter_facets(self, queryset, params, facet_fields):
+        for name, field in facet_fields.items():
+            values = params.get_facet(name)
+            if values:
+                queryset = queryset.filter(**{field + '__in': values})
+        return queryset
+
+    def order(self, queryset, params, orderings):
+        if params.sort in orderings:
+            return queryset.order_by(*orderings[params.sort])
+        return queryset
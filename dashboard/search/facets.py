@@ -0,0 +1,141 @@
+'''
+Facet values and counts for search listings.
+
+All the facets, and the number of results left after applying the
+selected facet filters, come out of one grouped query over the
+unfiltered results:
+
+    SELECT ..., GROUPING(...), COUNT(*), SUM(hit)
+    FROM (<results before facet filters>)
+    GROUP BY GROUPING SETS ((subject), (state), (curriculum), (language), ())
+
+where `hit` is 1 for rows that also pass the facet filters. The empty
+grouping set gives the totals. Facet blocks are cached per normalized
+query since they don't depend on the sort order or page, and are
+invalidated along with the other cached search data.
+'''
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from dashboard.search.cache import (
+    SEARCH_CACHE_TIMEOUT,
+    make_cache_key,
+    normalize_text,
+)
+from dashboard.search.compiler import QUESTION_FACETS
+
+
+def get_facet_cache_key(params, scope=''):
+    '''
+    Returns the cache key for the facet block of the given search.
+
+    `scope` distinguishes listings that start from different rows
+    (for example, the review page of different users).
+    '''
+
+    return make_cache_key('search_facets', {
+        'scope': scope,
+        'text': normalize_text(params.text),
+        'categories': sorted(params.categories),
+        'question_categories': sorted(params.question_categories),
+        'facets': {
+            name: sorted(values)
+            for name, values in params.facets.items()
+            if values
+        },
+    })
+
+
+def compute_facets(queryset, params):
+    '''
+    Returns the facet block for the given Question queryset, which
+    should be the search results before facet filtering.
+
+    The block is a dict with `total` (the number of questions that
+    pass the facet filters) and, for each facet name, a list of
+    `(value, count)` pairs sorted by value. Blank values are left out.
+    '''
+
+    facets = {name: [] for name in QUESTION_FACETS}
+    facets['total'] = 0
+
+    if queryset.query.is_empty():
+        return facets
+
+    names = list(QUESTION_FACETS)
+    aliases = ['facet_' + name for name in names]
+
+    selected = Q()
+    for name, field in QUESTION_FACETS.items():
+        values = params.get_facet(name)
+        if values:
+            selected &= Q(**{field + '__in': values})
+
+    if selected:
+        hit = Case(
+            When(selected, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField())
+    else:
+        hit = Value(1, output_field=IntegerField())
+
+    rows = queryset.order_by().values(
+        facet_hit=hit,
+        **{
+            alias: F(field)
+            for alias, field in zip(aliases, QUESTION_FACETS.values())
+        })
+    inner_sql, inner_params = rows.query.sql_with_params()
+
+    columns = ', '.join(aliases)
+    grouping_sets = ', '.join(['({})'.format(alias) for alias in aliases])
+    sql = '''
+        SELECT {columns}, GROUPING({columns}), COUNT(*), SUM(facet_hit)
+        FROM ({inner}) AS results
+        GROUP BY GROUPING SETS ({grouping_sets}, ())
+    '''.format(
+        columns=columns,
+        inner=inner_sql,
+        grouping_sets=grouping_sets,
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, inner_params)
+        result_rows = cursor.fetchall()
+
+    # GROUPING() has a bit set for every column that is *not* part of
+    # the grouping set; the leftmost column is the highest bit.
+    all_bits = (1 << len(names)) - 1
+    for row in result_rows:
+        grouping, count, hits = row[len(names):]
+
+        if grouping == all_bits:
+            facets['total'] = int(hits or 0)
+            continue
+
+        for i, name in enumerate(names):
+            if grouping == all_bits ^ (1 << (len(names) - 1 - i)):
+                if row[i]:
+                    facets[name].append((row[i], count))
+                break
+
+    for name in names:
+        facets[name].sort()
+
+    return facets
+
+
+def get_facets(queryset, params, scope=''):
+    '''
+    Returns the facet block for the given search, from the cache if
+    it has been computed since the content last changed.
+    '''
+
+    key = get_facet_cache_key(params, scope)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset, params)
+        cache.set(key, facets, SEARCH_CACHE_TIMEOUT)
+    return facets
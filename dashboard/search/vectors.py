@@ -0,0 +1,89 @@
+'''
+Full-text matching and ranking for Sawaliram content.
+
+Questions and articles carry a stored `search_vector` column which is
+kept up to date by database triggers (see migrations 0039 and 0040),
+so searching never has to run `to_tsvector` over a table at query
+time. The question weights below mirror the ones used by the trigger:
+
+  * A: question text and its English translation
+  * B: school, area and state
+  * C: field of interest and publication name
+
+Article vectors weigh titles as A and bodies as C, include the text of
+all published translations, and are only set for published articles
+(the GIN index over them is partial on the published status).
+'''
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+)
+from django.db.models import F, Q
+
+# Text search configuration used by the triggers and by all queries.
+# Queries must use the same configuration as the stored vectors for
+# the GIN index to be of any use.
+SEARCH_CONFIG = 'english'
+
+QUESTION_SEARCH_WEIGHTS = {
+    'question_text': 'A',
+    'question_text_english': 'A',
+    'school': 'B',
+    'area': 'B',
+    'state': 'B',
+    'field_of_interest': 'C',
+    'published_source': 'C',
+}
+
+
+def make_search_query(text):
+    '''
+    Return a SearchQuery for the given user-entered text, using the
+    same configuration as the stored search vectors.
+    '''
+
+    return SearchQuery(text, config=SEARCH_CONFIG)
+
+
+def search_questions(queryset, text):
+    '''
+    Filter a Question queryset by the given search text and order it
+    by relevance.
+
+    Numeric searches also match the question ID, so that volunteers
+    can jump straight to a question by typing its number.
+    '''
+
+    query = make_search_query(text)
+
+    condition = Q(search_vector=query)
+    if text.strip().isdigit():
+        condition |= Q(pk=int(text.strip()))
+
+    return (queryset
+        .filter(condition)
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', '-created_on'))
+
+
+def search_articles(queryset, text):
+    '''
+    Filter an Article queryset by the given search text and order it
+    by relevance.
+
+    The queryset should be limited to published articles (for example
+    `PublishedArticle.objects`), since only those have a search vector
+    and only those are covered by the partial index.
+    '''
+
+    query = make_search_query(text)
+
+    condition = Q(search_vector=query)
+    if text.strip().isdigit():
+        condition |= Q(pk=int(text.strip()))
+
+    return (queryset
+        .filter(condition)
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', '-updated_on'))
@@ -0,0 +1,41 @@
+'''
+Signal handlers for the dashboard models
+'''
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from dashboard.models import (
+    Answer,
+    AnswerTranslation,
+    Article,
+    ArticleTranslation,
+    Question,
+    QuestionTombstone,
+    TranslatedQuestion,
+)
+from dashboard.search import bump_generation
+
+# Models whose changes can alter search results. Proxy models (like
+# PublishedArticle or DraftAnswerTranslation) send signals under their
+# own name, so senders are matched on their concrete model.
+SEARCHABLE_MODELS = [
+    Question,
+    Answer,
+    Article,
+    TranslatedQuestion,
+    AnswerTranslation,
+    ArticleTranslation,
+]
+
+
+@receiver(post_save, dispatch_uid='search_cache_post_save')
+@receiver(post_delete, dispatch_uid='search_cache_post_delete')
+def invalidate_search_cache(sender, **kwargs):
+    if sender._meta.concrete_model in SEARCHABLE_MODELS:
+        bump_generation()
+
+
+@receiver(post_delete, sender=Question, dispatch_uid='question_tombstone_post_delete')
+def record_question_tombstone(sender, instance, **kwargs):
+    QuestionTombstone.objects.create(question_id=instance.id)
@@ -0,0 +1,188 @@
+'''
+Reading and writing question spreadsheets in bounded memory.
+
+read_sheet() yields an uploaded sheet as a series of DataFrames of at
+most `chunk_size` rows, using openpyxl's read-only mode for Excel
+files and the csv module for CSV files, so only one chunk of a sheet
+is held in memory at a time however many rows it has. The chunks look
+like the DataFrame pd.read_excel() would have returned: the first row
+holds the column names, empty cells are NaN and the index counts the
+rows of the sheet from 0.
+'''
+
+import csv
+import io
+import os
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+SHEET_CHUNK_SIZE = 1000
+
+
+def get_file_name(source):
+    if isinstance(source, str):
+        return source
+    return getattr(source, 'name', '') or ''
+
+
+def is_csv(source):
+    return os.path.splitext(get_file_name(source))[1].lower() == '.csv'
+
+
+def open_workbook(source):
+    '''
+    Opens a path or an (uploaded) file as a read-only workbook
+    '''
+
+    if not isinstance(source, str):
+        source.seek(0)
+    return openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+
+def make_columns(header):
+    columns = []
+    for i, name in enumerate(header):
+        if name is None or name == '':
+            # the name pandas gives columns without a header
+            name = 'Unnamed: {}'.format(i)
+        columns.append(name if isinstance(name, str) else str(name))
+    return columns
+
+
+def make_chunk(rows, positions, columns):
+    # pad or cut rows to the width of the header
+    width = len(columns)
+    rows = [(list(row) + [None] * width)[:width] for row in rows]
+
+    chunk = pd.DataFrame(
+        rows,
+        columns=columns,
+        index=pd.Index(positions, dtype='int64'),
+        dtype=object)
+    chunk = chunk.replace({None: np.nan, '': np.nan})
+    return chunk.infer_objects()
+
+
+def iter_excel_rows(source):
+    workbook = open_workbook(source)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def iter_csv_rows(source):
+    if isinstance(source, str):
+        f = open(source, 'r', newline='', encoding='utf-8-sig')
+    else:
+        source.seek(0)
+        f = io.TextIOWrapper(
+            getattr(source, 'file', source), newline='', encoding='utf-8-sig')
+
+    try:
+        for row in csv.reader(f):
+            yield row
+    finally:
+        if isinstance(source, str):
+            f.close()
+        else:
+            # leave the uploaded file open for whoever else reads it
+            f.detach()
+
+
+def parse_dates(column):
+    '''
+    Parses a column of dates as they are written in sheets: ISO dates,
+    day-first dates like '12/03/2020', '12 March 2020' and so on, or
+    dates Excel already stored as dates. Cells that aren't dates come
+    out as NaT.
+    '''
+
+    return pd.to_datetime(column, errors='coerce', format='mixed', dayfirst=True)
+
+
+def is_empty_row(row):
+    return all(value is None or value == '' for value in row)
+
+
+def estimate_row_count(source):
+    '''
+    Returns the number of rows below the header as recorded in an
+    Excel file's dimensions, without reading the rows, or None if
+    that isn't known (for CSV files, say)
+    '''
+
+    if is_csv(source):
+        return None
+
+    workbook = open_workbook(source)
+    try:
+        max_row = workbook.worksheets[0].max_row
+    finally:
+        workbook.close()
+
+    if max_row is None:
+        return None
+    return max(max_row - 1, 0)
+
+
+def read_sheet(source, chunk_size=SHEET_CHUNK_SIZE):
+    '''
+    Yields the rows of the first sheet of an Excel file, or of a CSV
+    file, as DataFrames of up to `chunk_size` rows. `source` is a path
+    or a file object; CSV files are recognised by their name.
+
+    Empty rows are skipped, but still counted in the index, so that
+    the index of a row always matches its position in the sheet. At
+    least one (possibly empty) DataFrame is yielded, so the columns
+    can always be read off the first chunk.
+    '''
+
+    rows = iter_csv_rows(source) if is_csv(source) else iter_excel_rows(source)
+
+    header = next(rows, None)
+    columns = make_columns(header or [])
+
+    yielded = False
+    chunk_rows, chunk_positions = [], []
+    for position, row in enumerate(rows):
+        if is_empty_row(row):
+            continue
+        chunk_rows.append(row)
+        chunk_positions.append(position)
+
+        if len(chunk_rows) >= chunk_size:
+            yield make_chunk(chunk_rows, chunk_positions, columns)
+            yielded = True
+            chunk_rows, chunk_positions = [], []
+
+    if chunk_rows or not yielded:
+        yield make_chunk(chunk_rows, chunk_positions, columns)
+
+
+class SheetWriter:
+    '''
+    Writes an Excel file a chunk of rows at a time, using openpyxl's
+    write-only mode
+    '''
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.worksheet = self.workbook.create_sheet('Sheet 1')
+        self.worksheet.append(self.columns)
+
+    def write(self, chunk):
+        chunk = chunk[self.columns].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            self.worksheet.append(list(row))
+
+    def close(self):
+        self.workbook.save(self.path)
+        self.workbook.close()
+
@@ -1,10 +1,6 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import os
-import csv
-
 from celery import shared_task
 from django.core.cache import cache
+from django.db import connection
 from sawaliram_auth.models import (
     User,
     VolunteerRequest
@@ -14,8 +10,11 @@ from dashboard.models import (
     SubmittedArticle,
     PublishedArticle,
     Question,
-    Answer
+    Answer,
+    IngestionJob,
 )
+from dashboard.exports import upload_question_delta
+from dashboard.ingestion import run_job
 
 
 @shared_task
@@ -39,45 +38,54 @@ def updateDashboardTasksStats():
         PublishedArticle.objects.count()
     )
 
-def update_local_csv(objects, fields, csv_file_name):
+@shared_task
+def update_suggestions():
     """
-    Writes the rows of all the objects in csv_file_name file
+    Rewrite the search suggestions file; web processes pick up the
+    new file the next time they answer a suggestions request
     """
-    with open(csv_file_name, 'w') as csvfile:
-        writer = csv.writer(csvfile)
-        # write your header first
-        header = []
-        for i in range(len(fields)):
-            field = fields[i]
-            header.append(str(field))
-        writer.writerow(header)
 
-        for obj in objects:
-            row = []
-            for field in fields:
-                 row.append(str(obj[field]))
-            writer.writerow(row)
+    # imported here since public_website depends on this app
+    from public_website.suggestions import write_suggestions_file
+    write_suggestions_file()
 
+@shared_task
+def write_dataset_snapshots():
+    """
+    Write the nightly snapshot files of the question corpus and their
+    manifest
+    """
+
+    # imported here since public_website depends on this app
+    from public_website.snapshots import write_snapshots
+    write_snapshots()
 
-def update_sheet(client, spreadsheet, csv_file_name):
+@shared_task
+def refresh_question_statistics():
     """
-    Updates the google sheet "sheet" with the data from the file csv_file_name
+    Recompute the question counts shown on the analytics page. The
+    refresh is done concurrently, so the page can still read the old
+    counts while the new ones are being worked out.
     """
-    with open(csv_file_name, 'r') as file_ob:
-        content = file_ob.read().encode('utf-8')
-        client.import_csv(spreadsheet.id, data=content)
 
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'REFRESH MATERIALIZED VIEW CONCURRENTLY question_statistics')
 
+@shared_task
+def ingest_dataset(job_id):
+    """
+    Save the spreadsheet of an IngestionJob
+    """
 
+    run_job(IngestionJob.objects.get(id=job_id))
 
 @shared_task
-def update_to_cloud_task():
-    scope = ['https://spreadsheets.google.com/feeds',"https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(os.environ.get('google_secret_key_file'), scope)
-    client = gspread.authorize(creds)
-    spreadsheet = client.open("questions")
-    fields = ['state', 'student_gender', 'student_class', 'question_format', 'contributor_role', 'context', 'medium_language', 'curriculum_followed', 'question_asked_on', 'field_of_interest', 'language', 'question_text_english', 'question_text', 'id']
-    csv_file_name = "question_tableau.csv"
-    objects = Question.objects.values(*fields)
-    update_local_csv(objects, fields, csv_file_name)
-    update_sheet(client, spreadsheet, csv_file_name)
+def update_to_cloud_task(full=False):
+    """
+    Bring the question export up to date with the changes since the
+    last run and upload it with the configured uploader. Pass
+    full=True to export every question again.
+    """
+
+    upload_question_delta(full=full)
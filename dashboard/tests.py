@@ -1,6 +1,36 @@
-from django.test import TestCase
+import csv
+import datetime
+import os
+import shutil
+import tempfile
+import threading
+
+from django.db import connection
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
 from dashboard.models import *
+from dashboard.exports import (
+    LocalFileUploader,
+    upload_question_delta,
+    upload_question_export,
+)
+from dashboard.ingestion import BASE_DIR, QUESTION_COLUMNS, ingest_questions, run_job
+from dashboard.management.commands import import_datasets
+from dashboard.pagination import CursorPaginator
+from dashboard.spreadsheets import read_sheet
+from dashboard.validation import curated_sheet_validator, new_sheet_validator
+from dashboard.search import (
+    SearchCompiler,
+    SearchParams,
+    compute_facets,
+    get_generation,
+)
+from dashboard.views import ReviewAnswersList
 from sawaliram_auth.models import User
+import pandas as pd
 class ArticleTranslationTests(TestCase):
     '''
     Check translations functionality of Articles, Questions and Answers.
@@ -154,6 +184,62 @@ class QuestionTranslationTestCase(TestCase):
         q.set_language('en')
         self.assertEqual(q.tr_question_text, self.question_en)
 
+    def test_question_prefetch_translations(self):
+        u1 = User.objects.get(email='hugin@hrafnaguo.god')
+        Question.objects.create(
+            id=2,
+            question_text='Why is the sky blue?',
+            language='en',
+            curated_by=u1,
+        )
+        Question.objects.create(
+            id=3,
+            question_text='आसमान नीला क्यों है?',
+            language='hi',
+            curated_by=u1,
+        )
+
+        # one query for the questions and one for their translations
+        with self.assertNumQueries(2):
+            questions = list(Question.objects
+                .prefetch_translations('en')
+                .order_by('id'))
+
+        self.assertEqual(
+            [q.tr_question_text for q in questions],
+            [self.question_en, 'Why is the sky blue?', 'आसमान नीला क्यों है?'])
+        self.assertEqual(
+            [q.is_translated for q in questions],
+            [True, False, False])
+
+    def test_question_annotate_translations(self):
+        u1 = User.objects.get(email='hugin@hrafnaguo.god')
+        Question.objects.create(
+            id=2,
+            question_text='Why is the sky blue?',
+            language='en',
+            curated_by=u1,
+        )
+
+        questions = Question.objects.annotate_translations('en')
+
+        # the translated text can be filtered and ordered on in SQL
+        self.assertEqual(
+            list(questions
+                .filter(tr_question_text__startswith='How')
+                .values_list('id', flat=True)),
+            [1])
+        self.assertEqual(
+            list(questions
+                .order_by('-tr_question_text')
+                .values_list('tr_question_text', flat=True)),
+            ['Why is the sky blue?', self.question_en])
+
+        with self.assertNumQueries(1):
+            q = questions.get(id=1)
+            self.assertEqual(q.tr_question_text, self.question_en)
+            self.assertEqual(q.question_text, self.question_bn)
+
     def test_question_list_available_languages(self):
         '''
         Does the question correctly list all available languages?
@@ -189,3 +275,808 @@ class QuestionTranslationTestCase(TestCase):
             set(dict(a.list_available_languages())),
             set(('en', 'bn'))
         )
+
+
+class SearchIndexTestCase(TestCase):
+    '''
+    Check that compiled searches are answered from the search vector
+    indexes rather than by scanning and re-parsing every row
+    '''
+
+    def setUp(self):
+        u1 = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+
+        Question.objects.create(
+            question_text='Why does the moon change its shape?',
+            language='en',
+            curated_by=u1,
+            encoded_by=u1,
+        )
+
+        PublishedArticle.objects.create(
+            title='Phases of the moon',
+            body='The moon does not really change its shape.',
+            language='en',
+            author=u1,
+            approved_by=u1,
+        )
+
+        self.compiler = SearchCompiler({
+            'questions': Question.objects.all(),
+            'articles': PublishedArticle.objects.all(),
+        })
+        self.params = SearchParams(
+            text='moon',
+            categories=['questions', 'articles'],
+            sort='relevance',
+        )
+
+    def explain(self, queryset):
+        # The test tables are tiny, so make sure the planner only
+        # falls back to a sequential scan when it has no other way
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_search_finds_results(self):
+        results = self.compiler.compile(self.params)
+        self.assertEqual(results['questions'].count(), 1)
+        self.assertEqual(results['articles'].count(), 1)
+
+    def test_question_search_uses_index(self):
+        queryset = self.compiler.compile(self.params)['questions']
+        self.assertIn('question_search_vector_idx', self.explain(queryset))
+
+    def test_article_search_uses_index(self):
+        queryset = self.compiler.compile(self.params)['articles']
+        self.assertIn('article_search_vector_idx', self.explain(queryset))
+
+
+class SearchFacetsTestCase(TestCase):
+    '''
+    Check the facet values and counts computed for search results
+    '''
+
+    def setUp(self):
+        u1 = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+
+        for state, language in [
+            ('Goa', 'en'),
+            ('Goa', 'hi'),
+            ('Kerala', 'en'),
+            ('', 'en'),
+        ]:
+            Question.objects.create(
+                question_text='Why is the sky blue?',
+                state=state,
+                language=language,
+                field_of_interest='Physics',
+                curated_by=u1,
+                encoded_by=u1,
+            )
+
+    def test_facet_counts(self):
+        params = SearchParams(facets={'state': ['Goa']})
+        facets = compute_facets(Question.objects.all(), params)
+
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(facets['state'], [('Goa', 2), ('Kerala', 1)])
+        self.assertEqual(facets['language'], [('en', 3), ('hi', 1)])
+        self.assertEqual(facets['subject'], [('Physics', 4)])
+
+    def test_facets_of_empty_results(self):
+        facets = compute_facets(Question.objects.none(), SearchParams())
+        self.assertEqual(facets['total'], 0)
+        self.assertEqual(facets['state'], [])
+
+
+class CursorPaginationTestCase(TestCase):
+    '''
+    Check that cursor pagination visits every row exactly once, in
+    order, in both directions
+    '''
+
+    def setUp(self):
+        u1 = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+
+        # Several questions share a subject, so the ID has to break ties
+        for i in range(7):
+            Question.objects.create(
+                question_text='Question {}'.format(i),
+                field_of_interest=['Biology', 'Physics'][i % 2],
+                curated_by=u1,
+                encoded_by=u1,
+            )
+
+    def test_forward_and_back(self):
+        queryset = Question.objects.order_by('-field_of_interest')
+        expected = list(queryset.order_by('-field_of_interest', '-pk'))
+        paginator = CursorPaginator(queryset, 3)
+
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+
+        self.assertEqual([page.number for page in pages], [1, 2, 3])
+        self.assertEqual(
+            [question for page in pages for question in page],
+            expected)
+
+        previous = paginator.get_page(pages[-1].previous_cursor)
+        self.assertEqual(previous.number, 2)
+        self.assertEqual(list(previous), list(pages[1]))
+        self.assertTrue(previous.has_previous())
+
+    def test_bad_cursor_shows_first_page(self):
+        paginator = CursorPaginator(Question.objects.order_by('pk'), 3)
+        page = paginator.get_page('not a cursor')
+        self.assertEqual(page.number, 1)
+        self.assertEqual(list(page), list(Question.objects.order_by('pk')[:3]))
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class SearchCacheInvalidationTestCase(TestCase):
+    '''
+    Check that changes to searchable content invalidate cached
+    search results
+    '''
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+
+        self.question = Question.objects.create(
+            question_text='Why is the sky blue?',
+            curated_by=self.user,
+            encoded_by=self.user,
+        )
+
+    def assertBumpsGeneration(self, change):
+        generation = get_generation()
+        change()
+        self.assertNotEqual(get_generation(), generation)
+
+    def test_question_save_and_delete(self):
+        self.question.question_text = 'Why is the sea blue?'
+        self.assertBumpsGeneration(self.question.save)
+        self.assertBumpsGeneration(self.question.delete)
+
+    def test_proxy_model_save(self):
+        self.assertBumpsGeneration(lambda: PublishedArticle.objects.create(
+            title='Rayleigh scattering',
+            body='Blue light is scattered more.',
+            language='en',
+            author=self.user,
+            approved_by=self.user,
+        ))
+
+
+class ReviewQueueOrderingTestCase(TestCase):
+    '''
+    Check that the review queue lists questions with the fewest
+    comments on their submitted answers first
+    '''
+
+    def setUp(self):
+        self.reviewer = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+        expert = User.objects.create_user(
+            first_name='Munin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='munin@hrafnaguo.god',
+            password='pass',
+        )
+
+        answer_type = ContentType.objects.get_for_model(Answer)
+        self.questions = []
+        for comment_count in [2, 0, 1]:
+            question = Question.objects.create(
+                question_text='Why is the sky blue?',
+                curated_by=expert,
+                encoded_by=expert,
+            )
+            answer = Answer.objects.create(
+                question_id=question,
+                answer_text='Rayleigh scattering',
+                status=Answer.STATUS_SUBMITTED,
+                submitted_by=expert,
+            )
+            for i in range(comment_count):
+                Comment.objects.create(
+                    text='Needs a source',
+                    author=self.reviewer,
+                    content_type=answer_type,
+                    object_id=answer.id,
+                )
+            self.questions.append(question)
+
+    def test_ordered_by_comment_count(self):
+        request = RequestFactory().get('/dashboard/review-answers')
+        request.user = self.reviewer
+
+        questions = ReviewAnswersList().get_base_querysets(request)['questions']
+        self.assertEqual(
+            [(question.id, question.comment_count) for question in questions],
+            [
+                (self.questions[1].id, 0),
+                (self.questions[2].id, 1),
+                (self.questions[0].id, 2),
+            ])
+
+
+class QuestionIngestionTestCase(TestCase):
+    '''
+    Check that uploaded question sheets are cleaned and saved in
+    batches
+    '''
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+
+    def test_ingest_questions(self):
+        sheet = pd.DataFrame({
+            'Question': [' Why is the sky blue? ', None, 'Why is grass green?'],
+            'Question Language': ['en', 'en', 'en'],
+            'State': ['Goa', 'Goa', None],
+            'Published (Yes/No)': ['Yes', 'No', None],
+        })
+
+        report = ingest_questions(sheet, QuestionArchive,
+            batch_size=1, submitted_by=self.user)
+
+        self.assertEqual(report.row_count, 2)
+        self.assertEqual(len(report.batch_timings), 2)
+
+        questions = QuestionArchive.objects.order_by('id')
+        self.assertEqual(
+            [(q.question_text, q.state, q.published, q.submitted_by)
+                for q in questions],
+            [
+                ('Why is the sky blue?', 'Goa', True, self.user),
+                ('Why is grass green?', '', False, self.user),
+            ])
+
+    def test_ingest_csv_dates(self):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Question', 'Question Language', 'Date of asking the question'])
+            writer.writerow(['Why is the sky blue?', 'en', '12/03/2020'])
+            writer.writerow(['Why is grass green?', 'en', ''])
+
+        try:
+            self.assertEqual(new_sheet_validator.check_rows(read_sheet(path)), {})
+            ingest_questions(read_sheet(path), QuestionArchive, submitted_by=self.user)
+        finally:
+            os.remove(path)
+
+        self.assertEqual(
+            list(QuestionArchive.objects
+                .order_by('id')
+                .values_list('question_asked_on', flat=True)),
+            [datetime.date(2020, 3, 12), None])
+
+    def test_skip_duplicates(self):
+        ingest_questions(
+            pd.DataFrame({
+                'Question': ['Why is the sky blue?'],
+                'Question Language': ['en'],
+            }),
+            QuestionArchive,
+            submitted_by=self.user)
+
+        sheet = pd.DataFrame({
+            'Question': [
+                'why is the  SKY blue?',
+                'Why is grass green?',
+                'Why is grass\tgreen? ',
+                'Why is grass green?',
+            ],
+            'Question Language': ['en', 'en', 'en', 'hi'],
+        })
+        report = ingest_questions(sheet, QuestionArchive,
+            batch_size=2,
+            skip_duplicates_in=[QuestionArchive, Question],
+            submitted_by=self.user)
+
+        self.assertEqual(report.row_count, 2)
+        self.assertEqual(report.duplicate_count, 2)
+        self.assertEqual(
+            list(QuestionArchive.objects
+                .order_by('id')
+                .values_list('question_text', 'language')),
+            [
+                ('Why is the sky blue?', 'en'),
+                ('Why is grass green?', 'en'),
+                ('Why is grass green?', 'hi'),
+            ])
+
+
+class IngestionJobTestCase(TestCase):
+    '''
+    Check that ingestion jobs record their outcome and report it on
+    the status endpoint
+    '''
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+
+        handle, self.path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        pd.DataFrame({
+            'Question': ['Why is the sky blue?'],
+            'Field of Interest': ['Physics'],
+            'dataset_id': [12345],
+        }).to_excel(self.path, index=False)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_failed_job(self):
+        job = IngestionJob.objects.create(
+            kind=IngestionJob.KIND_CURATED,
+            file_path=self.path,
+            submitted_by=self.user)
+
+        run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestionJob.STATUS_FAILED)
+        self.assertEqual(job.total_rows, 1)
+        self.assertEqual(len(job.errors), 1)
+        self.assertFalse(Question.objects.exists())
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse(
+            'dashboard:ingestion-job-status',
+            kwargs={'job_id': job.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'failed')
+        self.assertTrue(response.json()['finished'])
+
+    def test_curated_job(self):
+        dataset = Dataset.objects.create(
+            question_count=2,
+            submitted_by=self.user,
+            status='new')
+        pd.DataFrame({
+            'Question': ['Why is the sky blue?', 'Who was Socrates?'],
+            'Published (Yes/No)': ['No', 'Yes'],
+            'Field of Interest': ['Physics', 'History-Philosophy & Practice of Science'],
+            'dataset_id': [dataset.id, dataset.id],
+        }).to_excel(self.path, index=False)
+
+        job = IngestionJob.objects.create(
+            kind=IngestionJob.KIND_CURATED,
+            file_path=self.path,
+            submitted_by=self.user)
+
+        run_job(job)
+
+        job.refresh_from_db()
+        dataset.refresh_from_db()
+        self.assertEqual(job.status, IngestionJob.STATUS_DONE)
+        self.assertEqual(job.processed_rows, 2)
+        self.assertEqual(dataset.status, 'curated')
+        self.assertEqual(
+            list(Question.objects.order_by('id').values_list(
+                'field_of_interest', 'published', 'dataset_id', 'curated_by')),
+            [
+                ('Physics', False, str(dataset.id), self.user.id),
+                ('History, Philosophy & Practice of Science', True, str(dataset.id), self.user.id),
+            ])
+
+    def test_encoded_job(self):
+        question = Question.objects.create(
+            question_text='Why is the sky blue?',
+            curated_by=self.user)
+        submission = UnencodedSubmission.objects.create(
+            submission_id=7,
+            number_of_questions=2,
+            excel_sheet_name='encoded.xlsx')
+        pd.DataFrame({
+            'id': [question.id, question.id + 1],
+            'submission_id': [7, 7],
+            'Subject of class/session': ['Physics', 'Physics'],
+            'Question topic "R"elated or "U"nrelated to the topic or "S"ponteneous': ['R', 'S'],
+            'Motivation for asking question': ['Curiosity', None],
+            'Type of information requested': ['Explanation', 'Fact'],
+            'Source': ['Observation', 'Book'],
+            'Curiosity index': ['High', 'Low'],
+            'Urban/Rural': ['Urban', 'Rural'],
+            'Type of school': ['Government', 'Private'],
+            'Comments for coding rationale': [None, None],
+        }).to_excel(self.path, index=False)
+
+        job = IngestionJob.objects.create(
+            kind=IngestionJob.KIND_ENCODED,
+            file_path=self.path,
+            submitted_by=self.user)
+
+        run_job(job)
+
+        job.refresh_from_db()
+        question.refresh_from_db()
+        submission.refresh_from_db()
+        self.assertEqual(job.status, IngestionJob.STATUS_DONE)
+        self.assertEqual(job.processed_rows, 1)
+        self.assertEqual(len(job.errors), 1)
+        self.assertTrue(job.errors[0].startswith('Row #2'))
+        self.assertEqual(question.motivation, 'Curiosity')
+        self.assertEqual(question.comments_on_coding_rationale, '')
+        self.assertEqual(question.encoded_by, self.user)
+        self.assertTrue(submission.encoded)
+
+
+class ImportDatasetsTestCase(TestCase):
+    '''
+    Check that the import_datasets command finds the sheets in a
+    directory and imports each of them as a submitted dataset
+    '''
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+        # the command's workers set this; import_file() is called
+        # directly here
+        self.addCleanup(setattr, import_datasets, 'write_slots', import_datasets.write_slots)
+        import_datasets.write_slots = threading.Semaphore(1)
+
+    def write_sheet(self, name, **values):
+        path = os.path.join(self.directory, name)
+        pd.DataFrame({
+            column: [values.get(column)] for column in QUESTION_COLUMNS
+        }).to_excel(path, index=False)
+        return path
+
+    def test_find_sheets(self):
+        for name in ['b.csv', 'a.xlsx', 'c.txt', '~$a.xlsx']:
+            open(os.path.join(self.directory, name), 'w').close()
+
+        command = import_datasets.Command()
+
+        self.assertEqual(
+            command.find_sheets(self.directory),
+            [os.path.join(self.directory, 'a.xlsx'), os.path.join(self.directory, 'b.csv')])
+        with self.assertRaises(CommandError):
+            command.find_sheets(os.path.join(self.directory, 'a.xlsx'))
+
+    def test_import_file(self):
+        for directory in ['uploads/submissions/uncurated', 'uploads/submissions/raw']:
+            os.makedirs(os.path.join(BASE_DIR, directory), exist_ok=True)
+
+        path = self.write_sheet('valid.xlsx', **{
+            'Question': 'Why is the sky blue?',
+            'Question Language': 'en',
+            'Context': 'Classroom',
+            'Contributor Name': 'Munin',
+        })
+
+        summary = import_datasets.import_file(path, self.user.id)
+
+        dataset = Dataset.objects.get()
+        for name in [
+                'uncurated/dataset_{}_uncurated.xlsx'.format(dataset.id),
+                'raw/dataset_{}_raw.xlsx'.format(dataset.id)]:
+            self.addCleanup(os.remove, os.path.join(BASE_DIR, 'uploads/submissions', name))
+
+        self.assertEqual(summary['file'], 'valid.xlsx')
+        self.assertEqual(summary['status'], IngestionJob.STATUS_DONE)
+        self.assertEqual(summary['rows'], 1)
+        self.assertEqual(summary['dataset'], dataset.id)
+        self.assertEqual(summary['errors'], [])
+        self.assertEqual(dataset.submitted_by, self.user)
+        self.assertEqual(
+            list(QuestionArchive.objects.values_list('question_text', flat=True)),
+            ['Why is the sky blue?'])
+
+    def test_import_invalid_file(self):
+        path = self.write_sheet('invalid.xlsx', **{
+            'Question': 'Why is the sky blue?',
+            'Question Language': 'en',
+            'Contributor Name': 'Munin',
+        })
+
+        summary = import_datasets.import_file(path, self.user.id)
+
+        self.assertEqual(summary['status'], 'invalid')
+        self.assertEqual(summary['rows'], 0)
+        self.assertNotIn('dataset', summary)
+        self.assertEqual(summary['errors'], ['Row #1: Context field cannot be empty.'])
+        self.assertFalse(IngestionJob.objects.exists())
+        self.assertFalse(QuestionArchive.objects.exists())
+
+    def test_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command('import_datasets', self.directory, user='munin@hrafnaguo.god')
+
+
+class ReadSheetTestCase(SimpleTestCase):
+    '''
+    Check that sheets are read in chunks that match what pandas would
+    have read
+    '''
+
+    def write_file(self, suffix, content=None):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        if content is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        return path
+
+    def test_excel_chunks(self):
+        path = self.write_file('.xlsx')
+        pd.DataFrame({
+            'Question': ['Why?', None, 'How?', 'When?'],
+            'State': ['Goa', None, None, 'Kerala'],
+        }).to_excel(path, index=False)
+
+        chunks = list(read_sheet(path, chunk_size=2))
+
+        self.assertEqual([list(chunk.index) for chunk in chunks], [[0, 2], [3]])
+        self.assertEqual(list(chunks[0].columns), ['Question', 'State'])
+        self.assertEqual(list(chunks[0]['Question']), ['Why?', 'How?'])
+        self.assertTrue(pd.isna(chunks[0]['State'][2]))
+
+    def test_csv_chunks(self):
+        path = self.write_file('.csv', 'Question,State\nWhy?,Goa\nHow?,\n')
+
+        chunks = list(read_sheet(path))
+
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(list(chunks[0]['Question']), ['Why?', 'How?'])
+        self.assertTrue(pd.isna(chunks[0]['State'][1]))
+
+    def test_empty_sheet(self):
+        path = self.write_file('.csv', 'Question,State\n')
+
+        chunks = list(read_sheet(path))
+
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(list(chunks[0].columns), ['Question', 'State'])
+        self.assertEqual(len(chunks[0].index), 0)
+
+
+class SheetValidationTestCase(SimpleTestCase):
+    '''
+    Check that sheet validation reports every error of every row
+    '''
+
+    def make_sheet(self, rows, columns):
+        sheet = pd.DataFrame(rows, columns=columns)
+        return sheet.replace({None: float('nan')})
+
+    def test_column_errors(self):
+        errors = new_sheet_validator.check_columns(['Question', 'Colour'])
+        self.assertEqual(errors, [
+            'The columns of the Excel template are modified. Please use the standard template!',
+            '"Colour" is not a standard column. Please use the standard template!',
+        ])
+
+    def test_row_errors(self):
+        columns = [
+            'Question',
+            'Question Language',
+            'Context',
+            'Published (Yes/No)',
+            'Publication Name',
+            'Contributor Name',
+            'Date of asking the question',
+        ]
+        sheet = self.make_sheet([
+            ['Why?', 'en', 'Class', 'No', None, 'Hugin', '2019-08-12'],
+            [None, 'en', None, 'Yes', None, 'Hugin', 'someday'],
+            ['How?', None, 'Class', 'Yes', 'Eddas', None, None],
+        ], columns)
+
+        errors = new_sheet_validator.check_rows([sheet.iloc[:2], sheet.iloc[2:]])
+
+        self.assertEqual(errors, {
+            'Row #2': [
+                'Question field cannot be empty.',
+                'Context field cannot be empty.',
+                'If the question was published, you must mention the publication name.',
+                'Date of asking the question must be a valid date.',
+            ],
+            'Row #3': [
+                'Question Language field cannot be empty.',
+                'You must mention the name of the contributor.',
+            ],
+        })
+
+    def test_language_code(self):
+        sheet = self.make_sheet([
+            ['Why?', 'en'],
+            ['How?', 'english'],
+        ], ['Question', 'Question Language'])
+
+        errors = curated_sheet_validator.check_rows([sheet])
+
+        self.assertEqual(errors, {
+            'Row #2': ['Question Language must be an ISO 639-1 code.'],
+        })
+
+
+class BulkAcceptQuestionsTestCase(TestCase):
+    '''
+    Check that archived questions are moved to the question table in
+    bulk
+    '''
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+        self.archived = [
+            QuestionArchive.objects.create(
+                question_text=text,
+                state='Goa',
+                submitted_by=self.user,
+            )
+            for text in ['Why is the sky blue?', 'Why is grass green?']
+        ]
+
+    def test_accept_questions(self):
+        ids = [question.id for question in self.archived]
+        missing_id = max(ids) + 1
+
+        result = QuestionArchive.accept_questions(ids + [missing_id], self.user)
+
+        self.assertEqual(result['moved'], ids)
+        self.assertEqual(result['failed'], [missing_id])
+        self.assertFalse(QuestionArchive.objects.exists())
+
+        questions = Question.objects.filter(id__in=result['questions']).order_by('id')
+        self.assertEqual(
+            [(q.question_text, q.state, q.curated_by) for q in questions],
+            [
+                ('Why is the sky blue?', 'Goa', self.user),
+                ('Why is grass green?', 'Goa', self.user),
+            ])
+        self.assertIsNone(questions[0].encoded_by)
+
+
+class QuestionExportTestCase(TestCase):
+    '''
+    Check that the question export is written in chunks and handed to
+    the uploader
+    '''
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+        self.questions = [
+            Question.objects.create(
+                question_text=text,
+                language='en',
+                state='Goa',
+                curated_by=self.user,
+            )
+            for text in ['Why is the sky blue?', 'Why is grass, green?', 'Why do cats purr?']
+        ]
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_export_to_local_file(self):
+        count = upload_question_export(
+            LocalFileUploader(self.directory), chunk_size=2)
+
+        self.assertEqual(count, 3)
+
+        with open(os.path.join(self.directory, 'question_tableau.csv'), newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(
+            [(row['id'], row['question_text'], row['state']) for row in rows],
+            [(str(q.id), q.question_text, 'Goa') for q in self.questions])
+
+    def read_export(self):
+        with open(os.path.join(self.directory, 'question_tableau.csv'), newline='') as f:
+            return [(int(row['id']), row['question_text']) for row in csv.DictReader(f)]
+
+    def test_incremental_export(self):
+        hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        half_hour_ago = timezone.now() - datetime.timedelta(minutes=30)
+        Question.objects.update(updated_on=hour_ago)
+        uploader = LocalFileUploader(self.directory)
+
+        with override_settings(QUESTION_EXPORT_DIR=self.directory):
+            result = upload_question_delta(uploader)
+            self.assertTrue(result['full'])
+            self.assertEqual(
+                self.read_export(),
+                [(q.id, q.question_text) for q in self.questions])
+
+            # as if the full export had run an hour ago, so that the
+            # changes below are older than the next run's cutoff but
+            # newer than the checkpoint
+            ExportCheckpoint.objects.update(last_deleted_on=hour_ago)
+
+            deleted, changed, unchanged = self.questions
+            deleted.delete()
+            Question.objects.filter(id=changed.id).update(
+                question_text='Why is grass red?', updated_on=half_hour_ago)
+            added = Question.objects.create(
+                question_text='Why do stars twinkle?',
+                language='en',
+                curated_by=self.user,
+            )
+            Question.objects.filter(id=added.id).update(updated_on=half_hour_ago)
+            QuestionTombstone.objects.update(deleted_on=half_hour_ago)
+
+            result = upload_question_delta(uploader)
+            self.assertEqual(result, {'full': False, 'changed': 2, 'deleted': 1})
+            self.assertEqual(self.read_export(), [
+                (changed.id, 'Why is grass red?'),
+                (unchanged.id, unchanged.question_text),
+                (added.id, 'Why do stars twinkle?'),
+            ])
+            self.assertFalse(QuestionTombstone.objects.exists())
+
+            # nothing has changed since
+            result = upload_question_delta(uploader)
+            self.assertEqual(result, {'full': False, 'changed': 0, 'deleted': 0})
@@ -0,0 +1,170 @@
+'''
+Validation of uploaded question spreadsheets.
+
+Each rule looks at a whole chunk of a sheet at once and returns a
+boolean mask of the rows that break it, so checking a sheet is a
+handful of column operations per chunk rather than Python code per
+row. Only the rows that have errors are then visited, to collect
+their messages into the same {'Row #n': [messages]} structure the
+excel-validation-errors template shows.
+'''
+
+import abc
+
+import pandas as pd
+
+from dashboard.ingestion import CURATED_QUESTION_COLUMNS, QUESTION_COLUMNS
+from dashboard.spreadsheets import parse_dates
+
+TEMPLATE_ERRORS_KEY = 'Problem(s) with the template:'
+
+
+class Rule(abc.ABC):
+    '''
+    A check on the rows of a sheet. Subclasses implement failures(),
+    which returns a boolean Series that is True for the rows of the
+    chunk that break the rule.
+    '''
+
+    def __init__(self, message):
+        self.message = message
+
+    @abc.abstractmethod
+    def failures(self, chunk):
+        pass
+
+    def get_column(self, chunk, column):
+        # rules on columns missing from the sheet don't apply; the
+        # template check reports the missing column instead
+        if column in chunk.columns:
+            return chunk[column]
+        return pd.Series(pd.NA, index=chunk.index, dtype=object)
+
+
+class Required(Rule):
+    '''
+    The column must not be empty
+    '''
+
+    def __init__(self, column, message):
+        super().__init__(message)
+        self.column = column
+
+    def failures(self, chunk):
+        if self.column not in chunk.columns:
+            return pd.Series(False, index=chunk.index)
+        return chunk[self.column].isna()
+
+
+class RequiredIf(Rule):
+    '''
+    The column must not be empty in rows where another column has the
+    given value
+    '''
+
+    def __init__(self, column, condition_column, condition_value, message):
+        super().__init__(message)
+        self.column = column
+        self.condition_column = condition_column
+        self.condition_value = condition_value
+
+    def failures(self, chunk):
+        condition = self.get_column(chunk, self.condition_column) == self.condition_value
+        return condition.fillna(False).astype(bool) \
+            & self.get_column(chunk, self.column).isna()
+
+
+class LanguageCode(Rule):
+    '''
+    The column, where it is filled in, must hold a two letter code
+    '''
+
+    def __init__(self, column, message):
+        super().__init__(message)
+        self.column = column
+
+    def failures(self, chunk):
+        column = self.get_column(chunk, self.column)
+        return column.notna() & (column.astype(str).str.strip().str.len() != 2)
+
+
+class ValidDate(Rule):
+    '''
+    The column, where it is filled in, must hold a date
+    '''
+
+    def __init__(self, column, message):
+        super().__init__(message)
+        self.column = column
+
+    def failures(self, chunk):
+        column = self.get_column(chunk, self.column)
+        return column.notna() & parse_dates(column).isna()
+
+
+class SheetValidator:
+    '''
+    Checks a sheet's columns against the template, and its rows
+    against a list of rules
+    '''
+
+    def __init__(self, standard_columns, rules):
+        self.standard_columns = list(standard_columns)
+        self.rules = rules
+
+    def check_columns(self, columns):
+        '''
+        Returns a list of the problems with the sheet's columns
+        '''
+
+        errors = []
+        columns = list(columns)
+
+        if len(columns) != len(self.standard_columns):
+            errors.append('The columns of the Excel template are modified. Please use the standard template!')
+
+        for column in columns:
+            if column not in self.standard_columns:
+                errors.append('"' + column + '" is not a standard column. Please use the standard template!')
+
+        return errors
+
+    def check_rows(self, chunks):
+        '''
+        Returns a dict of the errors in each row that has any, in the
+        order of the rows
+        '''
+
+        file_errors = {}
+        for chunk in chunks:
+            row_errors = {}
+            for rule in self.rules:
+                for index in chunk.index[rule.failures(chunk).to_numpy(dtype=bool)]:
+                    row_errors.setdefault(index, []).append(rule.message)
+
+            for index in sorted(row_errors):
+                # Adding 1 to compensate for 0 indexing
+                file_errors['Row #' + str(index + 1)] = row_errors[index]
+
+        return file_errors
+
+
+QUESTION_RULES = [
+    Required('Question', 'Question field cannot be empty.'),
+    Required('Question Language', 'Question Language field cannot be empty.'),
+    Required('Context', 'Context field cannot be empty.'),
+    RequiredIf(
+        'Publication Name', 'Published (Yes/No)', 'Yes',
+        'If the question was published, you must mention the publication name.'),
+    Required('Contributor Name', 'You must mention the name of the contributor.'),
+    ValidDate('Date of asking the question', 'Date of asking the question must be a valid date.'),
+    ValidDate('Publication Date', 'Publication Date must be a valid date.'),
+]
+
+new_sheet_validator = SheetValidator(QUESTION_COLUMNS, QUESTION_RULES)
+
+curated_sheet_validator = SheetValidator(CURATED_QUESTION_COLUMNS, QUESTION_RULES[:2] + [
+    LanguageCode('Question Language', 'Question Language must be an ISO 639-1 code.'),
+] + QUESTION_RULES[2:] + [
+    Required('Field of Interest', 'Field of Interest cannot be empty.'),
+])
@@ -1,5 +1,6 @@
 """Define the functions that handle various requests by returnig a view"""
 
+import itertools
 import random
 import os
 import urllib
@@ -20,8 +21,16 @@ from django.contrib.auth.models import Group
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.translation import get_language_info
 from django.utils.decorators import method_decorator
-from django.db.models import Q, Subquery
-from django.core.paginator import Paginator
+from django.utils import timezone
+from django.db.models import (
+    Count,
+    Exists,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
 from django.contrib.contenttypes.models import ContentType
 from django.views import View
 from django.views.generic import (
@@ -50,6 +59,16 @@ from sawaliram_auth.decorators import (
     permission_required,
     volunteer_permission_required,
 )
+from dashboard.ingestion import start_job
+from dashboard.spreadsheets import read_sheet
+from dashboard.validation import (
+    TEMPLATE_ERRORS_KEY,
+    curated_sheet_validator,
+    new_sheet_validator,
+)
+from dashboard.pagination import CursorPaginator, approximate_count
+from dashboard.search import bump_generation
+from dashboard.signals import SEARCHABLE_MODELS
 from dashboard.models import (
     LANGUAGE_CODES,
     QuestionArchive,
@@ -74,6 +93,7 @@ from dashboard.models import (
     DraftArticleTranslation,
     Comment,
     Dataset,
+    IngestionJob,
     AnswerTranslationCredit,
     ArticleTranslationCredit,
     PublishedTranslatedQuestion)
@@ -131,88 +151,18 @@ class SubmitQuestionsView(View):
     def post(self, request):
         """Save dataset to archive and return success message"""
 
-        # save the questions in the archive
-        excel_sheet = pd.read_excel(request.FILES.get('excel_file'))
-        columns = list(excel_sheet)
-
-        column_name_mapping = {
-            'Question': 'question_text',
-            'Question Language': 'language',
-            'English translation of the question': 'question_text_english',
-            'How was the question originally asked?': 'question_format',
-            'Context': 'context',
-            'Date of asking the question': 'question_asked_on',
-            'Student Name': 'student_name',
-            'Gender': 'student_gender',
-            'Student Class': 'student_class',
-            'School Name': 'school',
-            'Curriculum followed': 'curriculum_followed',
-            'Medium of instruction': 'medium_language',
-            'Area': 'area',
-            'State': 'state',
-            'Published (Yes/No)': 'published',
-            'Publication Name': 'published_source',
-            'Publication Date': 'published_date',
-            'Notes': 'notes',
-            'Contributor Name': 'contributor',
-            'Contributor Role': 'contributor_role'
-        }
-
-        for index, row in excel_sheet.iterrows():
-            question = QuestionArchive()
-
-            # only save the question if the question field is non-empty
-            if not row['Question'] != row['Question']:
-
-                for column in columns:
-                    column = column.strip()
-
-                    # check if the value is not nan
-                    if not row[column] != row[column]:
-
-                        if column == 'Published (Yes/No)':
-                            setattr(
-                                question,
-                                column_name_mapping[column],
-                                True if row[column] == 'Yes' else False)
-                        else:
-                            setattr(
-                                question,
-                                column_name_mapping[column],
-                                row[column].strip() if isinstance(row[column], str) else row[column])
-
-                question.submitted_by = request.user
-                question.save()
-
-        # create an entry for the dataset
-        dataset = Dataset()
-        dataset.question_count = len(excel_sheet.index)
-        dataset.submitted_by = request.user
-        dataset.status = 'new'
-        dataset.save()
-
-        # create raw file for archiving
-        BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        raw_filename = 'dataset_' + str(dataset.id) + '_raw.xlsx'
-        writer = pd.ExcelWriter(
-            os.path.join(BASE_DIR, 'uploads/submissions/raw/' + raw_filename))
-        excel_sheet.to_excel(writer, 'Sheet 1')
-        writer.close()
-
-        # create file for curation
-        excel_sheet['Field of Interest'] = ''
-        excel_sheet['dataset_id'] = dataset.id
-        uncurated_filename = 'dataset_' + str(dataset.id) + '_uncurated.xlsx'
-        writer = pd.ExcelWriter(
-            os.path.join(BASE_DIR, 'uploads/submissions/uncurated/' + uncurated_filename))
-        excel_sheet.to_excel(writer, 'Sheet 1')
-        writer.close()
+        # the sheet is saved in the background; the page polls the job
+        job = start_job(
+            IngestionJob.KIND_QUESTIONS,
+            request.FILES.get('excel_file'),
+            request.user)
 
         messages.success(request, (_('Thank you for the questions! We will get to work preparing the questions to be answered and translated.')))
         context = {
             'grey_background': 'True',
             'page_title': _('Submit Questions'),
             'enable_breadcrumbs': 'Yes',
+            'ingestion_job': job,
         }
         return render(request, 'dashboard/submit-questions.html', context)
 
@@ -222,62 +172,19 @@ class ValidateNewExcelSheet(View):
 
     def post(self, request):
         """Validate excel sheet and return status/errors"""
-        excel_file = pd.read_excel(request.FILES.get('excel_file'))
+        chunks = read_sheet(request.FILES.get('excel_file'))
+        first_chunk = next(chunks)
 
         file_errors = {}
-        general_errors = []
-        standard_columns = [
-            'Question',
-            'Question Language',
-            'English translation of the question',
-            'How was the question originally asked?',
-            'Context',
-            'Date of asking the question',
-            'Student Name',
-            'Gender',
-            'Student Class',
-            'School Name',
-            'Curriculum followed',
-            'Medium of instruction',
-            'Area',
-            'State',
-            'Published (Yes/No)',
-            'Publication Name',
-            'Publication Date',
-            'Notes',
-            'Contributor Name',
-            'Contributor Role'
-        ]
-
-        if len(list(excel_file)) != 20:
-            general_errors.append('The columns of the Excel template are modified. Please use the standard template!')
-
-        for column in list(excel_file):
-            if column not in standard_columns:
-                general_errors.append('"' + column + '" is not a standard column. Please use the standard template!')
+        general_errors = new_sheet_validator.check_columns(first_chunk.columns)
 
         if general_errors:
-            file_errors['Problem(s) with the template:'] = general_errors
+            file_errors[TEMPLATE_ERRORS_KEY] = general_errors
             response = render(request, 'dashboard/includes/excel-validation-errors.html', {'errors': file_errors})
             return HttpResponse(response)
 
-        for index, row in excel_file.iterrows():
-            row_errors = []
-
-            if row['Question'] != row['Question']:
-                row_errors.append('Question field cannot be empty.')
-            if row['Question Language'] != row['Question Language']:
-                row_errors.append('Question Language field cannot be empty.')
-            if row['Context'] != row['Context']:
-                row_errors.append('Context field cannot be empty.')
-            if row['Published (Yes/No)'] == 'Yes' and row['Publication Name'] != row['Publication Name']:
-                row_errors.append('If the question was published, you must mention the publication name.')
-            if row['Contributor Name'] != row['Contributor Name']:
-                row_errors.append('You must mention the name of the contributor.')
-
-            if row_errors:
-                # Adding 1 to compensate for 0 indexing
-                file_errors['Row #' + str(index + 1)] = row_errors
+        file_errors.update(new_sheet_validator.check_rows(
+            itertools.chain([first_chunk], chunks)))
 
         if file_errors:
             response = render(request, 'dashboard/includes/excel-validation-errors.html', {'errors': file_errors})
@@ -291,8 +198,8 @@ class ValidateNewExcelSheet(View):
 @method_decorator(permission_required('admins'), name='dispatch')
 class ManageUsersView(View):
     def get(self, request):
-        users = User.objects.all().order_by('profile__created_on')
-        all_user_count = len(users)
+        users = User.objects.all().order_by('id')
+        all_user_count = User.objects.count()
 
         access_requests = VolunteerRequest.objects.filter(status='pending')
 
@@ -307,9 +214,11 @@ class ManageUsersView(View):
             elif request.GET.get('email') == 'unverified':
                 users = users.filter(Q(profile__email_verified=False) | Q(profile__isnull=True))
 
+        # user IDs follow sign-up order, and unlike profile dates they
+        # are never missing, so they make a usable pagination key
         sort_by = request.GET.get('sort-by', 'newest')
         if sort_by == 'newest':
-            users = users.order_by('-profile__created_on')
+            users = users.order_by('-id')
 
         # remove duplicate results
         users = users.distinct()
@@ -331,17 +240,17 @@ class ManageUsersView(View):
                 users = users.filter(Q_object)
 
         # get total result size
-        result_size = len(users)
+        result_size, result_size_exact = approximate_count(users)
 
         # paginate users list
-        paginated_user_list = Paginator(users, 30)
-        page = request.GET.get('page', 1)
-        user_list_page = paginated_user_list.get_page(page)
+        paginated_user_list = CursorPaginator(users, 30, count=result_size)
+        user_list_page = paginated_user_list.get_page(request.GET.get('cursor'))
 
         context = {
             'users': user_list_page,
             'all_user_count': all_user_count,
             'result_size': result_size,
+            'result_size_exact': result_size_exact,
             'sort_by': sort_by,
             'permissions_to_filter_by': permissions_to_filter_by,
             'filter_by_email': filter_by_email,
@@ -432,66 +341,17 @@ class ManageContentView(View):
 class ValidateCuratedExcelSheet(View):
     def post(self, request):
         """Validate excel sheet and return status/errors"""
-        excel_file = pd.read_excel(request.FILES.get('excel_file'))
+        chunks = read_sheet(request.FILES.get('excel_file'))
+        first_chunk = next(chunks)
 
         file_errors = {}
-        general_errors = []
-        standard_columns = [
-            'Question',
-            'Question Language',
-            'English translation of the question',
-            'How was the question originally asked?',
-            'Context',
-            'Date of asking the question',
-            'Student Name',
-            'Gender',
-            'Student Class',
-            'School Name',
-            'Curriculum followed',
-            'Medium of instruction',
-            'Area',
-            'State',
-            'Published (Yes/No)',
-            'Publication Name',
-            'Publication Date',
-            'Notes',
-            'Contributor Name',
-            'Contributor Role',
-            'Field of Interest',
-            'dataset_id'
-        ]
-
-        if len(list(excel_file)) != 22:
-            general_errors.append('The columns of the Excel template are modified. Please use the standard template!')
-
-        for column in list(excel_file):
-            if column not in standard_columns:
-                general_errors.append('"' + column + '" is not a standard column. Please use the standard template!')
+        general_errors = curated_sheet_validator.check_columns(first_chunk.columns)
 
         if general_errors:
-            file_errors['Problem(s) with the template:'] = general_errors
-
-        for index, row in excel_file.iterrows():
-            row_errors = []
-
-            if row['Question'] != row['Question']:
-                row_errors.append('Question field cannot be empty.')
-            if row['Question Language'] != row['Question Language']:
-                row_errors.append('Question Language field cannot be empty.')
-            if len(row['Question Language']) != 2:
-                row_errors.append('Question Language must be an ISO 639-1 code.')
-            if row['Context'] != row['Context']:
-                row_errors.append('Context field cannot be empty.')
-            if row['Published (Yes/No)'] == 'Yes' and row['Publication Name'] != row['Publication Name']:
-                row_errors.append('If the question was published, you must mention the publication name.')
-            if row['Contributor Name'] != row['Contributor Name']:
-                row_errors.append('You must mention the name of the contributor.')
-            if row['Field of Interest'] != row['Field of Interest']:
-                row_errors.append('Field of Interest cannot be empty.')
-
-            if row_errors:
-                # Adding 1 to compensate for 0 indexing
-                file_errors['Row #' + str(index + 1)] = row_errors
+            file_errors[TEMPLATE_ERRORS_KEY] = general_errors
+
+        file_errors.update(curated_sheet_validator.check_rows(
+            itertools.chain([first_chunk], chunks)))
 
         if file_errors:
             response = render(request, 'dashboard/includes/excel-validation-errors.html', {'errors': file_errors})
@@ -505,118 +365,53 @@ class ValidateCuratedExcelSheet(View):
 @method_decorator(volunteer_permission_required, name='dispatch')
 class CurateDataset(View):
     def post(self, request):
-        """Save the data to Question table"""
-
-        excel_sheet = pd.read_excel(request.FILES.get('excel_file'))
-        columns = list(excel_sheet)
-
-        column_name_mapping = {
-            'Question': 'question_text',
-            'Question Language': 'language',
-            'English translation of the question': 'question_text_english',
-            'How was the question originally asked?': 'question_format',
-            'Context': 'context',
-            'Date of asking the question': 'question_asked_on',
-            'Student Name': 'student_name',
-            'Gender': 'student_gender',
-            'Student Class': 'student_class',
-            'School Name': 'school',
-            'Curriculum followed': 'curriculum_followed',
-            'Medium of instruction': 'medium_language',
-            'Area': 'area',
-            'State': 'state',
-            'Published (Yes/No)': 'published',
-            'Publication Name': 'published_source',
-            'Publication Date': 'published_date',
-            'Notes': 'notes',
-            'Contributor Name': 'contributor',
-            'Contributor Role': 'contributor_role',
-            'Field of Interest': 'field_of_interest',
-            'dataset_id': 'dataset_id',
-        }
-
-        # verify the dataset_id
-        dataset_id = list(excel_sheet['dataset_id'])[0]
-
-        try:
-            dataset = Dataset.objects.get(id=dataset_id)
-        except ObjectDoesNotExist:
-            messages.error(request, (_('We could not find that dataset by ID. Make sure you did not edit any other field except "Field of Interest".')))
-
-            datasets = Dataset.objects.all().order_by('-created_on')
-            context = {
-                'grey_background': 'True',
-                'page_title': _('Manage Content'),
-                'datasets': datasets
-            }
-            return render(request, 'dashboard/manage-content.html', context)
-
-        if dataset.status == 'curated':
-            messages.error(request, (_('This dataset is already curated. Make sure you are uploading the correct file.')))
-
-            datasets = Dataset.objects.all().order_by('-created_on')
-            context = {
-                'grey_background': 'True',
-                'page_title': _('Manage Content'),
-                'datasets': datasets
-            }
-            return render(request, 'dashboard/manage-content.html', context)
-
-        for index, row in excel_sheet.iterrows():
-            question = Question()
-
-            for column in columns:
-                column = column.strip()
-
-                # check if the value is not nan
-                if not row[column] != row[column]:
-
-                    if column == 'Published (Yes/No)':
-                        setattr(
-                            question,
-                            column_name_mapping[column],
-                            True if row[column] == 'Yes' else False)
-                    elif column == 'Field of Interest':
-                        if row[column] == 'History-Philosophy & Practice of Science':
-                            value = 'History, Philosophy & Practice of Science'
-                        else:
-                            value = row[column]
-                        setattr(
-                            question,
-                            column_name_mapping[column],
-                            value.strip() if isinstance(value, str) else value)
-                    else:
-                        setattr(
-                            question,
-                            column_name_mapping[column],
-                            row[column].strip() if isinstance(row[column], str) else row[column])
+        """Queue the curated dataset to be saved to the Question table"""
 
-            question.curated_by = request.user
-            question.save()
+        job = start_job(
+            IngestionJob.KIND_CURATED,
+            request.FILES.get('excel_file'),
+            request.user)
 
-        # update status of the dataset
-        dataset.status = 'curated'
-        dataset.save()
-
-        # return to Manage Content and show success message
-        messages.success(request, (_('Questions saved successfully! These will now be available for answering and translation.')))
+        # return to Manage Content and show the progress of the job
+        messages.success(request, (_('Your dataset has been uploaded. The questions will be available for answering and translation once they are saved.')))
 
         datasets = Dataset.objects.all().order_by('-created_on')
         context = {
             'grey_background': 'True',
             'page_title': _('Manage Content'),
-            'datasets': datasets
+            'datasets': datasets,
+            'ingestion_job': job,
         }
         return render(request, 'dashboard/manage-content.html', context)
 
 
+@method_decorator(login_required, name='dispatch')
+class IngestionJobStatus(View):
+    def get(self, request, job_id):
+        """Return the progress of one of the user's ingestion jobs"""
+
+        job = get_object_or_404(
+            IngestionJob,
+            id=job_id,
+            submitted_by=request.user)
+
+        return JsonResponse({
+            'id': job.id,
+            'kind': job.kind,
+            'status': job.status,
+            'finished': job.is_finished,
+            'total_rows': job.total_rows,
+            'processed_rows': job.get_progress(),
+            'errors': job.errors,
+            'dataset': job.dataset_id,
+        })
+
+
 @method_decorator(login_required, name='dispatch')
 @method_decorator(volunteer_permission_required, name='dispatch')
 class ViewQuestionsView(SearchView):
-    def get_querysets(self, request):
-        results = {}
-        results['questions'] = Question.objects.all()
-        return results
+    def get_base_querysets(self, request):
+        return {'questions': Question.objects.all()}
 
     def get_page_title(self, request):
         return _('View Questions')
@@ -628,82 +423,10 @@ class ViewQuestionsView(SearchView):
 @method_decorator(login_required, name='dispatch')
 @method_decorator(volunteer_permission_required, name='dispatch')
 class AnswerQuestions(SearchView):
-    def get_querysets(self, request):
-        '''
-        Returns a dict of querysets, one for each data type
-        '''
-
-        results = {}
-
-        if hasattr(self, 'get_queryset'):
-            warnings.warn('get_queryset is deprecated. Please use get_querysets instead.')
-
-            results['questions'] = self.get_queryset(request)
-            return results
+    default_question_categories = ['unanswered']
 
-        filters = self.filters
-        search_categories = filters.get('search_categories', [])
-
-
-        if not search_categories:
-            search_categories.append('questions')
-
-
-        if 'q' in request.GET and request.GET.get('q') != '':
-            if not search_categories:
-                results['questions'] = Question.objects.filter(
-                            Q(pk__iexact=request.GET.get('q')) |
-                            Q(question_text__search=request.GET.get('q')) |
-                            Q(question_text_english__search=request.GET.get('q')) |
-                            Q(school__search=request.GET.get('q')) |
-                            Q(area__search=request.GET.get('q')) |
-                            Q(state__search=request.GET.get('q')) |
-                            Q(field_of_interest__search=request.GET.get('q')) |
-                            Q(published_source__search=request.GET.get('q'))
-                        )
-
-            else:
-                if 'questions' in search_categories:
-                    results['questions'] = Question.objects.filter(
-                            Q(pk__iexact=request.GET.get('q')) |
-                            Q(question_text__search=request.GET.get('q')) |
-                            Q(question_text_english__search=request.GET.get('q')) |
-                            Q(school__search=request.GET.get('q')) |
-                            Q(area__search=request.GET.get('q')) |
-                            Q(state__search=request.GET.get('q')) |
-                            Q(field_of_interest__search=request.GET.get('q')) |
-                            Q(published_source__search=request.GET.get('q'))
-                        )
-                else:
-                    results['questions'] = Question.objects.none()
-
-        else:
-            if 'questions' in search_categories:
-                results['questions'] = Question.objects.all()
-            else:
-                results['questions'] = Question.objects.none()
-
-        return results
-
-
-    def set_filters(self, params):
-        filters = super().set_filters(params)
-
-        if len(filters['question_categories']) == 0:
-            if 'questions' not in params:
-                filters['question_categories'].append('unanswered')
-
-        self.filters = filters
-        return filters
-
-    def get_search_query(self, request):
-        """
-        Returns the search query
-        """
-        if 'q' in request.GET:
-            return request.GET.get('q')
-        else:
-            return ""
+    def get_base_querysets(self, request):
+        return {'questions': Question.objects.all()}
 
     def get_page_title(self, request):
         return _('Answer Questions')
@@ -716,52 +439,47 @@ class AnswerQuestions(SearchView):
 @method_decorator(login_required, name='dispatch')
 @method_decorator(volunteer_permission_required, name='dispatch')
 class ReviewAnswersList(SearchView):
-    def get_querysets(self, request):
-        results = {}
-        if 'q' in request.GET and request.GET.get('q') != '':
-            query_set = Question.objects.filter(
-                                answers__status='submitted',
-                            ).exclude(
-                                answers__submitted_by=request.user,
-                            ).distinct()
-            results['questions'] = query_set.filter(
-                    Q(question_text__search=request.GET.get('q')) |
-                    Q(question_text_english__search=request.GET.get('q')) |
-                    Q(school__search=request.GET.get('q')) |
-                    Q(area__search=request.GET.get('q')) |
-                    Q(state__search=request.GET.get('q')) |
-                    Q(field_of_interest__search=request.GET.get('q'))
+    def get_base_querysets(self, request):
+        submitted_answers = Answer.objects.filter(
+            question_id=OuterRef('pk'),
+            status=Answer.STATUS_SUBMITTED,
+        )
+        own_answers = Answer.objects.filter(
+            question_id=OuterRef('pk'),
+            submitted_by=request.user,
+        )
+        questions = (Question.objects
+            .filter(Exists(submitted_answers))
+            .exclude(Exists(own_answers)))
+
+        # Review questions with the fewest comments first
+        submitted_answer_ids = Answer.objects.filter(
+            question_id=OuterRef(OuterRef('pk')),
+            status=Answer.STATUS_SUBMITTED,
+        ).values('id')
+        comment_counts = (Comment.objects
+            .filter(
+                content_type=ContentType.objects.get_for_model(Answer),
+                object_id__in=Subquery(submitted_answer_ids),
             )
-            return results
-        else:
-            ques = Question.objects.filter(
-                                answers__status='submitted',
-                            ).exclude(
-                                answers__submitted_by=request.user,
-                            ).distinct()
-            temp = {}
-            temp2 = []
-
-            for q in ques:
-                a = q.answers.all()   
-                for ans in a:
-                    comment = ans.comments.all()
-                    temp[q] = comment.count()
-
-            sorted_tuples = sorted(temp.items(), key=lambda item: item[1])
-            sorted_dict = {k: v for k, v in sorted_tuples}
-            
-            res = sorted_dict.keys()
-            for b in res:
-                temp2.append(b.id)
-            
-            clauses = ' '.join(['WHEN id=%s THEN %s' % (pk, i) for i, pk in enumerate(temp2)])
-            ordering = 'CASE %s END' % clauses
+            .order_by()
+            .values('content_type')
+            .annotate(count=Count('id'))
+            .values('count'))
+
+        questions = (questions
+            .annotate(comment_count=Coalesce(
+                Subquery(comment_counts, output_field=IntegerField()),
+                0))
+            .order_by('comment_count', 'id'))
+
+        return {'questions': questions}
 
-            results['questions'] = Question.objects.filter(id__in=temp2).extra(
-            select={'ordering': ordering}, order_by=('ordering',))
+    def get_default_sort(self, request):
+        return 'comments'
 
-            return results
+    def get_facet_cache_scope(self, request):
+        return '{}:{}'.format(type(self).__name__, request.user.id)
 
     def get_page_title(self, request):
         return _('Review Answers')
@@ -1574,98 +1292,31 @@ class CreateAnswerCommentView(CreateCommentView):
 @method_decorator(login_required, name='dispatch')
 @method_decorator(volunteer_permission_required, name='dispatch')
 class TranslateAnswersList(SearchView):
-    # def set_filters(self, params):
-    #     filters = super().set_filters(params)
-        
-    #     search_categories = filters.get('search_categories', [])
-
-    #     if not search_categories:
-    #         search_categories.append('questions')
-    #     print(filters)
-
-    #     self.filters = filters
-    #     return filters
-
-
-    def get_querysets(self, request):
-        results = {}
-
-        filters = self.filters
-        search_categories = filters.get('search_categories', [])
-
-        if not search_categories:
-            search_categories.append('questions')
-
-
-        if 'q' in request.GET and request.GET.get('q') != '':
-            if not search_categories:
-                query_set = Question.objects.filter(
-                                    answers__isnull=False,
-                                    answers__status=Answer.STATUS_PUBLISHED,
-                                    answers__translations__isnull=True,
-                                ).distinct()
-
-                results['questions'] = query_set.filter(
-                        Q(question_text__search=request.GET.get('q')) |
-                        Q(question_text_english__search=request.GET.get('q')) |
-                        Q(school__search=request.GET.get('q')) |
-                        Q(area__search=request.GET.get('q')) |
-                        Q(state__search=request.GET.get('q')) |
-                        Q(field_of_interest__search=request.GET.get('q'))
-                )
-
-                results['articles'] = (PublishedArticle.objects.filter(
-                    translations__isnull=True,
-                )
-                .filter(
-                    Q(title__search=request.GET.get('q')) |
-                    Q(body__search=request.GET.get('q'))
-                )
-                .distinct())
-            else:
-                if 'questions' in search_categories:
-                    results['questions'] = Question.objects.filter(
-                                    answers__isnull=False,
-                                    answers__status=Answer.STATUS_PUBLISHED,
-                                    answers__translations__isnull=True,
-                                ).distinct()
-                else:
-                    results['questions'] = Question.objects.none()
-
-
-                if 'articles' in search_categories:
-                    results['articles'] = PublishedArticle.objects.filter(
-                        translations__isnull=True,
-                    ).distinct()
-                else:
-                    results['articles'] = PublishedArticle.objects.none()
-        else:
-            if 'questions' in search_categories:
-                results['questions'] = Question.objects.all()
-            else:
-                results['questions'] = Question.objects.none()
-
-            if 'articles' in search_categories:
-                results['articles'] = PublishedArticle.objects.all()
-            else:
-                results['articles'] = PublishedArticle.objects.none()
-
-        return results
+    default_question_categories = ['answered']
 
-    def set_filters(self, params):
-        filters = super().set_filters(params)
-
-        if len(filters['question_categories']) == 0:
-            if 'questions' not in params:
-                filters['question_categories'].append('answered')
-
-        self.filters = filters
-        return filters
+    def get_base_querysets(self, request):
+        untranslated_answers = Answer.objects.filter(
+            question_id=OuterRef('pk'),
+            status=Answer.STATUS_PUBLISHED,
+            translations__isnull=True,
+        )
+        article_translations = ArticleTranslation.objects.filter(
+            source=OuterRef('pk'),
+        )
 
+        return {
+            'questions': Question.objects.filter(Exists(untranslated_answers)),
+            'articles': PublishedArticle.objects.exclude(
+                Exists(article_translations)),
+        }
 
     def get_page_title(self, request):
         return 'Translate Content'
 
+    def get_translation_language(self, request):
+        # translators work from the content as it was written
+        return None
+
     def get_enable_breadcrumbs(self, request):
         return 'Yes'
 
@@ -2569,7 +2220,27 @@ class AdminBulkUpdateField(View):
 
         queryset = self.get_queryset(request.GET.get('ids'))
 
-        updated = queryset.update(**{field_name: new_value})
+        values = {field_name: new_value}
+        # update() doesn't apply auto_now, and incremental exports
+        # look for changes by updated_on
+        if any(field.name == 'updated_on' for field in queryset.model._meta.concrete_fields):
+            values['updated_on'] = timezone.now()
+
+        updated = queryset.update(**values)
+
+        # update() skips save(), so recompute the duplicate detection
+        # hash if it depends on the field that changed
+        if field_name in getattr(queryset.model, 'CONTENT_HASH_FIELDS', ()):
+            objects = list(queryset)
+            for obj in objects:
+                obj.update_content_hash()
+            queryset.model.objects.bulk_update(objects, ['content_hash'], batch_size=500)
+
+        # update() sends no post_save signals either, so tell search
+        # about the change here
+        if queryset.model._meta.concrete_model in SEARCHABLE_MODELS:
+            bump_generation()
+
         messages.success(request,
             _('%s items updated successfully.') % updated)
 
@@ -2595,31 +2266,11 @@ def get_encode_data_view(request):
 
 
 def submit_encoded_dataset(request):
-    """Save the encoding information to Question."""
-    excel_sheet = pd.read_excel(request.FILES[request.POST['excel-file-name']])
-
-    for index, row in excel_sheet.iterrows():
-        question = Question.objects.get(pk=row['id'])
-
-        question.submission_id = row['submission_id']
-        question.subject_of_session = row['Subject of class/session']
-        question.question_topic_relation = row['Question topic "R"elated or "U"nrelated to the topic or "S"ponteneous']
-        question.motivation = row['Motivation for asking question']
-        question.type_of_information = row['Type of information requested']
-        question.source = row['Source']
-        question.curiosity_index = row['Curiosity index']
-        question.urban_or_rural = row['Urban/Rural']
-        question.type_of_school = row['Type of school']
-        question.comments_on_coding_rationale = row['Comments for coding rationale']
-        question.encoded_by = request.user
-
-        question.save()
-
-    # set the UnencodedSubmission entry as curated
-    unencoded_submission_entry = UnencodedSubmission \
-        .objects.get(submission_id=list(excel_sheet['submission_id'])[0])
-    unencoded_submission_entry.encoded = True
-    unencoded_submission_entry.save()
+    """Queue the encoding information to be saved to Question."""
+    start_job(
+        IngestionJob.KIND_ENCODED,
+        request.FILES[request.POST['excel-file-name']],
+        request.user)
 
     return render(request, 'dashboard/excel-submitted-successfully.html')
 
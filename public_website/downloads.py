@@ -0,0 +1,263 @@
+'''
+Bulk downloads of the question corpus.
+
+A download is generated while it is being sent: the rows come from a
+server-side cursor a chunk at a time, and are encoded into pieces of
+about DOWNLOAD_PIECE_SIZE bytes for a StreamingHttpResponse, so
+however large the download, a worker only ever holds one chunk of it.
+
+The same request always produces the same bytes for as long as the
+search generation (see dashboard.search.cache) stays the same, which
+is what the ETag is made of. Once a download has been sent in full
+its length is cached under the ETag, and from then on the download
+can be resumed with a Range request.
+'''
+
+import csv
+import hashlib
+import io
+import json
+import zlib
+
+from django.core.cache import cache
+
+from dashboard.models import Answer, Question
+from dashboard.search import SearchCompiler, SearchParams, get_generation
+
+# Rows fetched from the database at a time
+DOWNLOAD_CHUNK_SIZE = 2000
+
+# Bytes of output collected before they are sent on
+DOWNLOAD_PIECE_SIZE = 64 * 1024
+
+# Lengths of complete downloads are kept this long
+DOWNLOAD_LENGTH_TIMEOUT = 60 * 60 * 24
+
+# The question fields that can be downloaded; the rest (the student's
+# name, who curated the question and so on) are not public
+QUESTION_DOWNLOAD_FIELDS = [
+    'id',
+    'question_text',
+    'question_text_english',
+    'language',
+    'question_format',
+    'context',
+    'state',
+    'area',
+    'school',
+    'student_gender',
+    'student_class',
+    'curriculum_followed',
+    'medium_language',
+    'contributor_role',
+    'question_asked_on',
+    'published',
+    'published_source',
+    'published_date',
+    'field_of_interest',
+    'subject_of_session',
+    'question_topic_relation',
+    'motivation',
+    'type_of_information',
+    'source',
+    'curiosity_index',
+    'urban_or_rural',
+    'type_of_school',
+]
+
+# Column name -> Answer field, added with answers=yes
+ANSWER_DOWNLOAD_FIELDS = {
+    'answer_id': 'id',
+    'answer_language': 'language',
+    'answer_text': 'answer_text',
+    'answer_published_on': 'published_on',
+}
+
+DOWNLOAD_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class DownloadError(Exception):
+    pass
+
+
+class Download:
+    '''
+    What a download request asks for: the questions matching its
+    search filters, in the chosen format and with the chosen columns
+    '''
+
+    def __init__(self, params):
+        self.format = params.get('format', 'csv')
+        if self.format not in DOWNLOAD_FORMATS:
+            raise DownloadError('Unknown format "{}"'.format(self.format))
+
+        self.gzip = params.get('gzip') == 'yes'
+        self.answers = params.get('answers') == 'yes'
+
+        if params.get('fields'):
+            self.fields = params.get('fields').split(',')
+            unknown = set(self.fields) - set(QUESTION_DOWNLOAD_FIELDS)
+            if unknown:
+                raise DownloadError('Unknown field(s) {}'.format(', '.join(sorted(unknown))))
+        else:
+            self.fields = QUESTION_DOWNLOAD_FIELDS
+
+        self.columns = list(self.fields)
+        if self.answers:
+            self.columns += list(ANSWER_DOWNLOAD_FIELDS)
+
+        self.search_params = SearchParams.from_querydict(params)
+        self.query = sorted(
+            (key, sorted(values)) for key, values in params.lists())
+
+    @property
+    def content_type(self):
+        if self.gzip:
+            return 'application/gzip'
+        return DOWNLOAD_FORMATS[self.format]
+
+    @property
+    def file_name(self):
+        name = 'sawaliram-questions.' + self.format
+        if self.gzip:
+            name += '.gz'
+        return name
+
+    def get_etag(self):
+        key = json.dumps([get_generation(), self.query])
+        return '"{}"'.format(hashlib.sha256(key.encode('utf-8')).hexdigest()[:32])
+
+    def get_length_cache_key(self, etag):
+        return 'download_length:{}'.format(etag.strip('"'))
+
+    def get_length(self, etag):
+        '''
+        Returns the length of the download, if it has been sent in
+        full before
+        '''
+        return cache.get(self.get_length_cache_key(etag))
+
+    def get_questions(self):
+        compiler = SearchCompiler({'questions': Question.objects.all()})
+        return compiler.compile_questions(self.search_params)
+
+    def get_rows(self):
+        '''
+        Returns an iterator over the rows to download, as tuples of
+        values in the order of the columns
+        '''
+
+        if not self.answers:
+            return (self.get_questions()
+                .order_by('id')
+                .values_list(*self.fields)
+                .iterator(chunk_size=DOWNLOAD_CHUNK_SIZE))
+
+        # one row per published answer, with its question's fields
+        return (Answer.objects
+            .filter(
+                status=Answer.STATUS_PUBLISHED,
+                question_id__in=self.get_questions().values('id'))
+            .order_by('question_id', 'id')
+            .values_list(
+                *['question_id__' + field for field in self.fields],
+                *ANSWER_DOWNLOAD_FIELDS.values())
+            .iterator(chunk_size=DOWNLOAD_CHUNK_SIZE))
+
+    def encode(self, rows):
+        '''
+        Yields the rows as pieces of text in the download's format
+        '''
+
+        buffer = io.StringIO()
+
+        if self.format == 'csv':
+            writer = csv.writer(buffer)
+            writer.writerow(self.columns)
+            write = writer.writerow
+        else:
+            def write(row):
+                buffer.write(json.dumps(
+                    dict(zip(self.columns, row)),
+                    ensure_ascii=False,
+                    default=str))
+                buffer.write('\n')
+
+        for row in rows:
+            write(row)
+            if buffer.tell() >= DOWNLOAD_PIECE_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+
+    def generate(self):
+        '''
+        Yields the download as pieces of bytes
+        '''
+
+        pieces = (piece.encode('utf-8') for piece in self.encode(self.get_rows()))
+        if not self.gzip:
+            yield from pieces
+            return
+
+        # zlib writes a gzip header without a timestamp, so the same
+        # rows always compress to the same bytes
+        compressor = zlib.compressobj(wbits=31)
+        for piece in pieces:
+            compressed = compressor.compress(piece)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def stream(self, etag, start=0, end=None):
+        '''
+        Yields bytes start to end (inclusive; None for the end of the
+        download), and records the length of the download once it has
+        all been generated
+        '''
+
+        position = 0
+        for piece in self.generate():
+            piece_start, position = position, position + len(piece)
+            if position <= start:
+                continue
+            if end is not None and piece_start > end:
+                # the rest isn't wanted, and the length is known
+                return
+
+            yield piece[max(start - piece_start, 0):
+                None if end is None else end + 1 - piece_start]
+
+        cache.set(self.get_length_cache_key(etag), position, DOWNLOAD_LENGTH_TIMEOUT)
+
+
+def parse_range(header, length):
+    '''
+    Returns the (start, end) byte positions of a "bytes=start-end"
+    Range header, or None if it asks for anything else. Multiple
+    ranges are not supported.
+    '''
+
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+
+    start, _, end = header[len('bytes='):].strip().partition('-')
+    try:
+        if start:
+            start = int(start)
+            end = int(end) if end else length - 1
+        else:
+            # the last `end` bytes
+            start = max(length - int(end), 0)
+            end = length - 1
+    except ValueError:
+        return None
+
+    if start > end or start >= length:
+        return None
+    return start, min(end, length - 1)
@@ -0,0 +1,173 @@
+'''
+Precomputed snapshots of the question corpus.
+
+Every night the write_dataset_snapshots task writes the questions and
+the published answers (in the same form as the question download, see
+public_website.downloads) to files in SNAPSHOTS_ROOT, as gzipped CSV
+and, if pyarrow is installed, as Parquet. Each file is named after a
+hash of its contents, so a file never changes once written and can be
+cached forever; core.middleware.WhiteNoiseMiddleware serves them that
+way. The manifest lists the current files with their hashes and sizes,
+so clients can tell whether they already have the latest snapshot
+before downloading anything.
+'''
+
+import hashlib
+import json
+import logging
+import os
+import re
+
+from django.conf import settings
+from django.http import QueryDict
+from django.utils import timezone
+
+from public_website.downloads import DOWNLOAD_CHUNK_SIZE, Download
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MANIFEST_NAME = 'manifest.json'
+
+# Dataset name -> download parameters
+SNAPSHOT_DATASETS = {
+    'questions': 'gzip=yes',
+    'answers': 'gzip=yes&answers=yes',
+}
+
+SNAPSHOT_FILE_PATTERN = re.compile(r'^[a-z]+-[0-9a-f]{16}\.(csv\.gz|parquet)$')
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_csv_gz(download, path):
+    with open(path, 'wb') as f:
+        for piece in download.generate():
+            f.write(piece)
+
+
+def iter_batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_parquet(download, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # all columns are written as text, like in the CSV files
+    schema = pa.schema([(column, pa.string()) for column in download.columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in iter_batches(download.get_rows(), DOWNLOAD_CHUNK_SIZE):
+            writer.write_table(pa.Table.from_arrays(
+                [
+                    pa.array([None if value is None else str(value) for value in column], pa.string())
+                    for column in zip(*batch)
+                ],
+                schema=schema))
+
+
+def get_snapshot_writers():
+    '''
+    Returns a dict of file extension -> function writing a download
+    to a path, for the formats that can be written here
+    '''
+
+    writers = {'csv.gz': write_csv_gz}
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        logger.warning('pyarrow is not installed, so no Parquet snapshots are written')
+    else:
+        writers['parquet'] = write_parquet
+    return writers
+
+
+def write_snapshot_file(dataset, extension, write, download):
+    '''
+    Writes one snapshot file, named after the hash of its contents,
+    and returns its manifest entry
+    '''
+
+    temp_path = os.path.join(
+        settings.SNAPSHOTS_ROOT, '{}.{}.{}.tmp'.format(dataset, extension, os.getpid()))
+    write(download, temp_path)
+
+    digest = hash_file(temp_path)
+    name = '{}-{}.{}'.format(dataset, digest[:16], extension)
+    path = os.path.join(settings.SNAPSHOTS_ROOT, name)
+
+    size = os.path.getsize(temp_path)
+    if os.path.exists(path):
+        # unchanged since the last snapshot
+        os.remove(temp_path)
+    else:
+        os.replace(temp_path, path)
+
+    return {
+        'dataset': dataset,
+        'format': extension,
+        'name': name,
+        'url': settings.SNAPSHOTS_URL + name,
+        'sha256': digest,
+        'bytes': size,
+    }
+
+
+def read_manifest():
+    try:
+        with open(os.path.join(settings.SNAPSHOTS_ROOT, SNAPSHOT_MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(manifest):
+    path = os.path.join(settings.SNAPSHOTS_ROOT, SNAPSHOT_MANIFEST_NAME)
+    temp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def write_snapshots():
+    '''
+    Writes a snapshot of each dataset in each format, replaces the
+    manifest, and removes the files that neither the new nor the
+    previous manifest lists. Returns the new manifest.
+    '''
+
+    os.makedirs(settings.SNAPSHOTS_ROOT, exist_ok=True)
+
+    files = []
+    for dataset, params in SNAPSHOT_DATASETS.items():
+        download = Download(QueryDict(params))
+        for extension, write in get_snapshot_writers().items():
+            files.append(write_snapshot_file(dataset, extension, write, download))
+
+    previous = read_manifest() or {'files': []}
+    manifest = {
+        'generated_on': timezone.now().isoformat(),
+        'files': files,
+    }
+    write_manifest(manifest)
+
+    # keep the previous files for clients that have just read the
+    # previous manifest
+    keep = {entry['name'] for entry in files + previous['files']}
+    for name in os.listdir(settings.SNAPSHOTS_ROOT):
+        if SNAPSHOT_FILE_PATTERN.match(name) and name not in keep:
+            os.remove(os.path.join(settings.SNAPSHOTS_ROOT, name))
+
+    return manifest
@@ -109,7 +109,8 @@ function processSelectedExcelSheet() {
         var file_name = $(this).val().replace('C:\\fakepath\\', '');
 
         // check if file has valid extension
-        if (file_name.split('.').pop() == 'xlsx') {
+        var extension = file_name.split('.').pop().toLowerCase();
+        if (extension == 'xlsx' || extension == 'csv') {
             $('.excel-file-label i').removeClass('red');
             $('.excel-file-label i').addClass('green');
             $('.excel-file-label span').text(file_name);
@@ -164,10 +165,61 @@ function processSelectedExcelSheet() {
     });
 }
 
+function pollIngestionJob() {
+    var progress = $('.ingestion-progress');
+    if (!progress.length) {
+        return;
+    }
+
+    $.getJSON(progress.data('status-url'), function(job) {
+        if (job.status == 'done') {
+            progress.find('h5').html(
+                '<i class="far fa-check-circle green"></i> Saved ' + job.processed_rows + ' questions.'
+            );
+            if (job.errors.length) {
+                // rows that were skipped
+                var skipped_list = $('<ul>');
+                $.each(job.errors, function(i, error) {
+                    skipped_list.append($('<li>').text(error));
+                });
+                progress.find('.error-list').html(skipped_list);
+            }
+        }
+        else if (job.status == 'failed') {
+            progress.find('h5').html(
+                '<i class="far fa-times-circle red"></i> We could not save your sheet:'
+            );
+            var error_list = $('<ul>');
+            $.each(job.errors, function(i, error) {
+                error_list.append($('<li>').text(error));
+            });
+            progress.find('.error-list').html(error_list);
+        }
+        else {
+            if (job.total_rows) {
+                progress.find('.ingestion-progress-text').text(
+                    'Saving your sheet... (' + job.processed_rows + ' of ' + job.total_rows + ' rows)'
+                );
+            }
+            setTimeout(pollIngestionJob, 2000);
+        }
+    });
+}
+
 function setupResultsPagination() {
     $('.page-button').click(function() {
         var current_params = new URLSearchParams(location.search);
-        current_params.set('page', $(this).data('page'));
+        current_params.delete('page');
+
+        // an empty cursor means the first page
+        var cursor = $(this).attr('data-cursor');
+        if (cursor) {
+            current_params.set('cursor', cursor);
+        }
+        else {
+            current_params.delete('cursor');
+        }
+
         location.href = window.location.origin + window.location.pathname + '?' + current_params.toString();
     });
 }
@@ -197,7 +249,11 @@ function setupSearchResultsFilter() {
             if ($(this).hasClass('active')) {
                 var new_params_list = []
                 for (const value of current_params.entries()) {
-                    if (value[1] == $(this).data('value')) {
+                    if (value[0] == 'cursor') {
+                        // filtering starts again from the first page
+                        continue;
+                    }
+                    else if (value[1] == $(this).data('value')) {
                         if (value[0] != $(this).data('param')) {
                             new_params_list.push(value);
                         }
@@ -216,7 +272,7 @@ function setupSearchResultsFilter() {
                 }
             }
             else {
-                current_params.delete('page');
+                current_params.delete('cursor');
                 current_params.append($(this).data('param'), $(this).data('value'));
                 location.href = window.location.origin + window.location.pathname + '?' + current_params.toString();
             }
@@ -229,7 +285,7 @@ function setupUserListFilter() {
         var current_params = new URLSearchParams(location.search);
         current_params.delete('permission');
         current_params.delete('email');
-        current_params.delete('page');
+        current_params.delete('cursor');
         $('input[name="user-permission"]:checked').each(function() {
             current_params.append('permission', $(this).val());
         });
@@ -273,7 +329,7 @@ function setupSearchResultsClearAll() {
         var new_params_list = []
 
         for (const value of current_params.entries()) {
-            if ((value[0] == 'page') || (value[0] == 'sort-by') || (value[0] == 'q')) {
+            if ((value[0] == 'sort-by') || (value[0] == 'q')) {
                 new_params_list.push(value);
             }
         }
@@ -578,6 +634,7 @@ function setupToggleCardDrawer() {
 function setupGeneralContentSort() {
     $('.sort-by-option').click(function() {
         var current_params = new URLSearchParams(location.search);
+        current_params.delete('cursor');
         current_params.set('sort-by', $(this).data('sort'));
         location.href = window.location.origin + window.location.pathname + '?' + current_params.toString();
     });
@@ -845,9 +902,10 @@ if (window.location.pathname == '/') {
     setupHomePageCarouselRandomRhymes();
 }
 
-if (window.location.pathname.includes('/dashboard/question/submit') || window.location.pathname.includes('/dashboard/manage-content')) {
+if (window.location.pathname.includes('/dashboard/question/submit') || window.location.pathname.includes('/dashboard/manage-content') || window.location.pathname.includes('/dashboard/question/curate')) {
     disableSubmitExcelButtonOnPageLoad();
     processSelectedExcelSheet();
+    pollIngestionJob();
 }
 
 if (window.location.pathname.includes('/dashboard/manage-users')) {
@@ -855,6 +913,10 @@ if (window.location.pathname.includes('/dashboard/manage-users')) {
     setupResultsPagination();
 }
 
+if (window.location.pathname == '/articles') {
+    setupResultsPagination();
+}
+
 if (
     new RegExp("^/dashboard/translate/(articles|answers|questions)/(\\d+/)?\\d+/(review|edit)").test(window.location.pathname) ||
     new RegExp("^/dashboard/(article|answer)/(\\d+/)?\\d+/translate/from/(\\w+)/to/(\\w+)").test(window.location.pathname) ||
@@ -0,0 +1,151 @@
+'''
+Search suggestions for the autocomplete in the site header.
+
+The suggestions (the English text of all questions) are written to a
+file by a periodic Celery task. Each process loads that file into a
+SuggestionIndex once, and loads it again only when the file changes,
+so answering an autocomplete request is a couple of binary searches
+over sorted lists in memory.
+'''
+
+import bisect
+import csv
+import os
+import threading
+
+from dashboard.models import Question
+
+SUGGESTIONS_DIR = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '../assets/suggestions/'))
+SUGGESTIONS_FILE = os.path.join(SUGGESTIONS_DIR, 'suggestions.csv')
+
+DEFAULT_SUGGESTION_LIMIT = 8
+MAX_SUGGESTION_LIMIT = 20
+
+
+def normalize(text):
+    return text.casefold()
+
+
+def tokenize(text):
+    return normalize(text).split()
+
+
+class SuggestionIndex:
+    '''
+    A word-prefix index over a list of suggestions.
+
+    Every word of every suggestion is kept in one sorted list, next to
+    the number of the suggestion it came from. All words starting with
+    a given prefix then sit in one contiguous run of that list, which
+    bisect finds in O(log n).
+    '''
+
+    def __init__(self, suggestions):
+        self.suggestions = list(suggestions)
+        self.normalized = [normalize(text) for text in self.suggestions]
+
+        pairs = sorted(
+            (word, i)
+            for i, text in enumerate(self.normalized)
+            for word in set(text.split()))
+        self.words = [word for word, i in pairs]
+        self.positions = [i for word, i in pairs]
+
+    def __len__(self):
+        return len(self.suggestions)
+
+    def find_prefix(self, prefix):
+        '''
+        Returns the set of suggestion numbers with a word starting
+        with the given prefix
+        '''
+
+        start = bisect.bisect_left(self.words, prefix)
+        # '\U0010ffff' sorts after every character that can follow
+        # the prefix
+        end = bisect.bisect_right(self.words, prefix + '\U0010ffff', lo=start)
+        return set(self.positions[start:end])
+
+    def search(self, query, limit=DEFAULT_SUGGESTION_LIMIT):
+        '''
+        Returns up to `limit` suggestions that have a word starting
+        with each word of the query. Suggestions that start with the
+        query come first, then shorter ones.
+        '''
+
+        query_words = tokenize(query)
+        if not query_words:
+            return []
+
+        # Narrow down by the longest word first, as it will usually
+        # match the fewest suggestions
+        query_words.sort(key=len, reverse=True)
+        matches = self.find_prefix(query_words[0])
+        for word in query_words[1:]:
+            if not matches:
+                break
+            matches &= self.find_prefix(word)
+
+        normalized_query = normalize(query).strip()
+        ranked = sorted(matches, key=lambda i: (
+            not self.normalized[i].startswith(normalized_query),
+            len(self.suggestions[i]),
+            i,
+        ))
+        return [self.suggestions[i] for i in ranked[:limit]]
+
+
+def write_suggestions_file():
+    '''
+    Writes the current suggestions to the suggestions file. The file
+    is replaced in one step, so readers never see it half-written.
+    '''
+
+    os.makedirs(SUGGESTIONS_DIR, exist_ok=True)
+
+    suggestions = (Question.objects
+        .exclude(question_text_english='')
+        .exclude(question_text_english__isnull=True)
+        .order_by('question_text_english')
+        .values_list('question_text_english', flat=True)
+        .distinct()
+        .iterator())
+
+    temp_path = '{}.{}.tmp'.format(SUGGESTIONS_FILE, os.getpid())
+    with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=',')
+        for text in suggestions:
+            writer.writerow([text])
+    os.replace(temp_path, SUGGESTIONS_FILE)
+
+
+def read_suggestions_file():
+    with open(SUGGESTIONS_FILE, 'r', newline='', encoding='utf-8') as f:
+        return [''.join(row) for row in csv.reader(f) if row]
+
+
+_index = None
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+def get_suggestion_index():
+    '''
+    Returns this process's suggestion index, (re)loading it if the
+    suggestions file has changed since it was last loaded
+    '''
+
+    global _index, _index_mtime
+
+    if not os.path.isfile(SUGGESTIONS_FILE):
+        write_suggestions_file()
+    mtime = os.path.getmtime(SUGGESTIONS_FILE)
+
+    if _index is None or mtime != _index_mtime:
+        with _index_lock:
+            if _index is None or mtime != _index_mtime:
+                _index = SuggestionIndex(read_suggestions_file())
+                _index_mtime = mtime
+
+    return _index
@@ -1,3 +1,306 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dashboard.models import Answer, AnswerCredit, Comment, Question
+from dashboard.tasks import refresh_question_statistics
+from public_website.snapshots import write_snapshots
+from public_website.suggestions import SuggestionIndex
+from sawaliram_auth.models import User
+
+
+class SuggestionIndexTests(SimpleTestCase):
+    '''
+    Check prefix matching and ranking of search suggestions
+    '''
+
+    def setUp(self):
+        self.index = SuggestionIndex([
+            'Why is the sky blue?',
+            'How do birds fly?',
+            'Why do birds migrate in winter?',
+            'What is the sky made of?',
+        ])
+
+    def test_word_prefixes(self):
+        self.assertEqual(
+            self.index.search('bir mig'),
+            ['Why do birds migrate in winter?'])
+
+    def test_ranking_and_limit(self):
+        # suggestions starting with the query come first
+        self.assertEqual(
+            self.index.search('why', limit=1),
+            ['Why is the sky blue?'])
+        self.assertEqual(
+            self.index.search('sky'),
+            ['Why is the sky blue?', 'What is the sky made of?'])
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search('volcano'), [])
+        self.assertEqual(self.index.search('   '), [])
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class SearchResultsQueryCountTests(TestCase):
+    '''
+    Check that the number of queries for a page of search results
+    doesn't grow with the number of result cards
+    '''
+
+    # Queries allowed for a full page of results
+    QUERY_BUDGET = 10
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+
+    def create_questions(self, count):
+        answer_type = ContentType.objects.get_for_model(Answer)
+
+        for i in range(count):
+            question = Question.objects.create(
+                question_text='Why is the sky blue? ({})'.format(i),
+                curated_by=self.user,
+                encoded_by=self.user,
+            )
+            answer = Answer.objects.create(
+                question_id=question,
+                answer_text='Rayleigh scattering',
+                status=Answer.STATUS_PUBLISHED,
+                submitted_by=self.user,
+            )
+            AnswerCredit.objects.create(
+                answer=answer,
+                credit_title='author',
+                credit_user_name='Hugin Hrafna',
+                is_user=True,
+                user=self.user,
+            )
+            Comment.objects.create(
+                text='Nicely explained',
+                author=self.user,
+                content_type=answer_type,
+                object_id=answer.id,
+            )
+
+    def count_search_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('public_website:search'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        self.create_questions(1)
+        single_card_queries = self.count_search_queries()
+
+        self.create_questions(14)
+        full_page_queries = self.count_search_queries()
+
+        self.assertEqual(full_page_queries, single_card_queries)
+        self.assertLessEqual(full_page_queries, self.QUERY_BUDGET)
+
+
+class AnalyticsStatisticsTests(TestCase):
+    '''
+    Check that the analytics page is worked out from the question
+    statistics
+    '''
+
+    def setUp(self):
+        user = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+
+        for gender, subject in [
+            ('Female', 'Physics'),
+            ('Female', 'Biology'),
+            ('Male', 'Physics'),
+            ('', 'Physics'),
+        ]:
+            Question.objects.create(
+                question_text='Why is the sky blue?',
+                student_gender=gender,
+                field_of_interest=subject,
+                curated_by=user,
+                encoded_by=user,
+            )
+
+        refresh_question_statistics()
+
+    def test_counts(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('public_website:analytics'))
+        self.assertEqual(response.status_code, 200)
+
+        statistics_queries = [query for query in queries
+            if 'question_statistics' in query['sql']]
+        self.assertEqual(len(statistics_queries), 1)
+
+        self.assertEqual(response.context['question_counter'], 4)
+        self.assertEqual(response.context['gender_counts'], '[1, 2, 0, 1]')
+        subjects = response.context['genderSubjectDictionary']
+        self.assertEqual(subjects['Female']['Physics'], 1)
+        self.assertEqual(subjects['Female']['Biology'], 1)
+        self.assertEqual(subjects['Not known']['Physics'], 1)
+
+
+class DownloadQuestionsTests(TestCase):
+    '''
+    Check that the question download streams the filtered questions,
+    and can be resumed with a Range request
+    '''
+
+    def setUp(self):
+        cache.clear()
+
+        user = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+
+        self.questions = [
+            Question.objects.create(
+                question_text=text,
+                state=state,
+                student_name='Not for download',
+                curated_by=user,
+            )
+            for text, state in [
+                ('Why is the sky blue?', 'Goa'),
+                ('Why is grass green?', 'Kerala'),
+                ('Why do cats purr?', 'Goa'),
+            ]
+        ]
+        self.url = reverse('public_website:download-questions')
+
+    def download(self, **headers):
+        response = self.client.get(self.url, {
+            'state': 'Goa',
+            'fields': 'id,question_text',
+        }, **headers)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv(self):
+        response, content = self.download()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(content.decode('utf-8').splitlines(), [
+            'id,question_text',
+            '{},Why is the sky blue?'.format(self.questions[0].id),
+            '{},Why do cats purr?'.format(self.questions[2].id),
+        ])
+
+    def test_jsonl_gzip(self):
+        response = self.client.get(self.url, {'format': 'jsonl', 'gzip': 'yes'})
+        content = gzip.decompress(b''.join(response.streaming_content))
+
+        rows = [json.loads(line) for line in content.decode('utf-8').splitlines()]
+        self.assertEqual(
+            [row['question_text'] for row in rows],
+            [q.question_text for q in self.questions])
+        self.assertNotIn('student_name', rows[0])
+
+    def test_unknown_field(self):
+        response = self.client.get(self.url, {'fields': 'student_name'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_resume(self):
+        response, content = self.download()
+        etag = response['ETag']
+
+        response, part = self.download(HTTP_RANGE='bytes=10-', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(part, content[10:])
+        self.assertEqual(
+            response['Content-Range'],
+            'bytes 10-{}/{}'.format(len(content) - 1, len(content)))
+
+        response = self.client.get(self.url, {
+            'state': 'Goa',
+            'fields': 'id,question_text',
+        }, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class SnapshotTests(TestCase):
+    '''
+    Check that snapshots are written under content-hashed names and
+    served with immutable cache headers
+    '''
+
+    def setUp(self):
+        user = User.objects.create_user(
+            first_name='Hugin',
+            last_name='Hrafna',
+            organisation='Familiars of Odin',
+            email='hugin@hrafnaguo.god',
+            password='pass',
+        )
+        question = Question.objects.create(
+            question_text='Why is the sky blue?',
+            curated_by=user,
+        )
+        Answer.objects.create(
+            question_id=question,
+            answer_text='Rayleigh scattering',
+            status=Answer.STATUS_PUBLISHED,
+            submitted_by=user,
+        )
+
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(SNAPSHOTS_ROOT=self.directory)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+
+    def test_write_snapshots(self):
+        manifest = write_snapshots()
+        files = {(entry['dataset'], entry['format']): entry
+            for entry in manifest['files']}
+
+        answers = files[('answers', 'csv.gz')]
+        with gzip.open(os.path.join(self.directory, answers['name']), 'rt') as f:
+            self.assertIn('Rayleigh scattering', f.read())
+
+        # unchanged data gives the same files
+        self.assertEqual(
+            [entry['name'] for entry in write_snapshots()['files']],
+            [entry['name'] for entry in manifest['files']])
+
+        response = self.client.get(answers['url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get('/snapshots/manifest.json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
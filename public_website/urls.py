@@ -33,4 +33,5 @@ urlpatterns = [
     path('articles', views.ArticlesPage.as_view(), name='articles'),
     path('analytics/', views.AnalyticsPage.as_view(), name='analytics'),
     path('suggest/', views.Suggestions.as_view(), name='suggestions'),
+    path('download/questions', views.DownloadQuestions.as_view(), name='download-questions'),
 ]
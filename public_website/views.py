@@ -1,14 +1,15 @@
 """Define the View classes that will handle the public website pages"""
 
-import warnings
-
 from django.shortcuts import (
     render,
     redirect,
     get_object_or_404
 )
 from django.views import View
+from django.views.decorators.cache import cache_control
+from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
+from django.utils.translation import get_language
 from django.utils.translation import (
     ngettext,
     pgettext,
@@ -17,14 +18,19 @@ from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.hashers import check_password, make_password
 from django.http import Http404, JsonResponse
-from django.db.models import Q
-from django.db.models.query import QuerySet
-from django.core.paginator import Paginator
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.core.exceptions import PermissionDenied
 from django.template.loader import render_to_string
-from django.http import HttpResponse
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
 from django.core.mail import send_mail
+from django.core.cache import cache
 
 from django.conf import settings
 from public_website.forms import ContactPageForm
@@ -34,6 +40,7 @@ from django.urls import reverse
 from dashboard.models import (
     Dataset,
     Answer,
+    AnswerCredit,
     Question,
     Article,
     PublishedArticle,
@@ -46,12 +53,28 @@ from dashboard.models import (
     SubmittedAnswerTranslation,
     PublishedArticleTranslation,
     PublishedAnswerTranslation,
+    QuestionStatistics,
     AnswerTranslation,
     AnswerTranslationCredit,
     ArticleTranslationCredit,
 )
+from dashboard.mixins.translations import prefetch_translations
+from dashboard.pagination import CursorPage, CursorPaginator
+from dashboard.search import (
+    SEARCH_CACHE_TIMEOUT,
+    SearchCompiler,
+    SearchParams,
+    get_facets,
+    get_results_cache_key,
+)
 from sawaliram_auth.models import User, Bookmark, Notification
+from public_website.downloads import Download, DownloadError, parse_range
 from public_website.models import AnswerUserComment, ContactUsSubmission
+from public_website.suggestions import (
+    DEFAULT_SUGGESTION_LIMIT,
+    MAX_SUGGESTION_LIMIT,
+    get_suggestion_index,
+)
 
 import re
 import random
@@ -108,111 +131,54 @@ class SetLanguageView(View):
 
 class SearchView(View):
 
-    filters = {
-        'search_categories': [],
-        'question_categories': [],
-    }
+    ITEMS_PER_PAGE = 15
 
-    def set_filters(self, params):
+    # Question categories ('answered', 'unanswered') to show when the
+    # request doesn't pick any
+    default_question_categories = []
+
+    def get_search_params(self, request):
         '''
-        Process filters, setting default values if necessary
+        Returns the SearchParams for this request
         '''
 
-        search_categories = params.getlist('category')
-
-        # Select only questions by default, if no category selected
-        if not search_categories:
-            search_categories.append('questions')
+        return SearchParams.from_querydict(
+            request.GET,
+            default_sort=self.get_default_sort(request),
+            default_question_categories=self.default_question_categories)
 
+    def get_default_sort(self, request):
+        '''
+        Returns the sort order to use when none is selected, or None
+        to sort by relevance when searching and newest otherwise
+        '''
+        return None
 
-        question_categories = []
-        if 'questions' in params:
-            question_categories = params.getlist('questions')
-
-        # TODO: add other filters here too
+    def get_base_querysets(self, request):
+        '''
+        Returns a dict with the queryset to search within for each
+        content type. Subclasses override this to narrow down the
+        results; content types left out are never shown.
+        '''
 
-        filters = {
-            'search_categories': search_categories,
-            'question_categories': question_categories,
+        return {
+            'questions': Question.objects.all(),
+            'articles': PublishedArticle.objects.all(),
         }
 
-        self.filters = filters
-        return filters
-
-    def get_querysets(self, request):
+    def get_translation_language(self, request):
         '''
-        Returns a dict of querysets, one for each data type
+        Returns the language to show the results in, where they have
+        been translated to it, or None to show them as written
         '''
+        return get_language()
 
-        results = {}
-
-        # Backwards-compatibility for the old 'get_queryset' function
-        if hasattr(self, 'get_queryset'):
-            warnings.warn('get_queryset is deprecated. Please use get_querysets instead.')
-
-            results['questions'] = self.get_queryset(request)
-            return results
-
-        filters = self.filters
-        search_categories = filters.get('search_categories', [])
-
-        # Select only questions by default, if no category selected
-        if not search_categories:
-            search_categories.append('questions')
-
-
-        if 'q' in request.GET and request.GET.get('q') != '':
-            if not search_categories:
-                results['questions'] = Question.objects.filter(
-                            Q(pk__iexact=request.GET.get('q')) |
-                            Q(question_text__search=request.GET.get('q')) |
-                            Q(question_text_english__search=request.GET.get('q')) |
-                            Q(school__search=request.GET.get('q')) |
-                            Q(area__search=request.GET.get('q')) |
-                            Q(state__search=request.GET.get('q')) |
-                            Q(field_of_interest__search=request.GET.get('q')) |
-                            Q(published_source__search=request.GET.get('q'))
-                        )
-                results['articles'] = PublishedArticle.objects.filter(
-                            Q(title__search=request.GET.get('q')) |
-                            Q(pk__iexact=request.GET.get('q')) |
-                            Q(body__search=request.GET.get('q'))
-                        ).order_by('-updated_on')
-            else:
-                if 'questions' in search_categories:
-                    results['questions'] = Question.objects.filter(
-                            Q(pk__iexact=request.GET.get('q')) |
-                            Q(question_text__search=request.GET.get('q')) |
-                            Q(question_text_english__search=request.GET.get('q')) |
-                            Q(school__search=request.GET.get('q')) |
-                            Q(area__search=request.GET.get('q')) |
-                            Q(state__search=request.GET.get('q')) |
-                            Q(field_of_interest__search=request.GET.get('q')) |
-                            Q(published_source__search=request.GET.get('q'))
-                        )
-                else:
-                    results['questions'] = Question.objects.none()
-
-                if 'articles' in search_categories:
-                    results['articles'] = PublishedArticle.objects.filter(
-                            Q(title__search=request.GET.get('q')) |
-                            Q(pk__iexact=request.GET.get('q')) |
-                            Q(body__search=request.GET.get('q'))
-                        ).order_by('-updated_on')
-                else:
-                    results['articles'] = PublishedArticle.objects.none()
-        else:
-            if 'questions' in search_categories:
-                results['questions'] = Question.objects.all()
-            else:
-                results['questions'] = Question.objects.none()
-
-            if 'articles' in search_categories:
-                results['articles'] = PublishedArticle.objects.all()
-            else:
-                results['articles'] = PublishedArticle.objects.none()
-
-        return results
+    def get_facet_cache_scope(self, request):
+        '''
+        Returns a string identifying the base querysets, so that
+        cached facets are only shared between identical listings
+        '''
+        return type(self).__name__
 
     def get_template(self, request):
         '''
@@ -242,6 +208,131 @@ class SearchView(View):
         else:
             return ""
 
+    def get_results(self, request, params):
+        '''
+        Runs the search, returning a dict with the facets, the current
+        page of questions, the articles to show and the result counts
+        '''
+
+        compiler = SearchCompiler(self.get_base_querysets(request))
+
+        results = compiler.compile(params)
+        questions = results['questions']
+        articles = results['articles']
+
+        # facet values and the number of matching questions, from a
+        # single grouped query over the results before facet filtering
+        facets = get_facets(
+            compiler.compile_questions(params, apply_facets=False),
+            params,
+            scope=self.get_facet_cache_scope(request))
+
+        questions_count = facets['total']
+        articles_count = articles.count()
+
+        # save list of IDs for Submit Answer/Review Answer
+        page_title = self.get_page_title(request)
+        if page_title == _('Review Answers') or page_title == _('Answer Questions'):
+            result_id_list = list(questions.values_list('id', flat=True))
+            request.session['result_id_list'] = result_id_list
+
+        # the total is already known from the facet query
+        paginator = CursorPaginator(questions, self.ITEMS_PER_PAGE, count=questions_count)
+        questions_page = paginator.get_page(params.cursor)
+
+        # only show articles on first page
+        # TODO: make pagination smarter and inclusive
+        # of all data types
+        if articles_count and questions_page.number == 1:
+            articles = list(articles)
+        else:
+            articles = []
+
+        return {
+            'facets': facets,
+            'questions_page': questions_page,
+            'articles': articles,
+            'questions_count': questions_count,
+            'articles_count': articles_count,
+        }
+
+    def prefetch_results(self, questions):
+        '''
+        Loads everything the result cards show for the given questions
+        in a fixed number of queries, however many cards there are:
+        one for the answers (with their submitters and comment counts)
+        and one for the answers' credits
+        '''
+
+        answers = (Answer.objects
+            .select_related('submitted_by')
+            .annotate(comment_count=Count('comments'))
+            .prefetch_related(Prefetch(
+                'credits',
+                queryset=AnswerCredit.objects.select_related('user')))
+            .order_by('id'))
+
+        prefetch_related_objects(questions, Prefetch('answers', queryset=answers))
+
+    def use_result_cache(self, request):
+        '''
+        Returns whether to serve this request's results from the
+        search cache. Only anonymous visitors are served from it, as
+        the dashboard listings depend on the user and change as they
+        work through them.
+        '''
+        return not request.user.is_authenticated
+
+    def get_cached_results(self, request, params):
+        '''
+        Same as get_results(), but through the search cache: only the
+        IDs of the results are cached, and the objects are fetched
+        again with one query per content type
+        '''
+
+        key = get_results_cache_key(
+            params,
+            get_language(),
+            scope=self.get_facet_cache_scope(request))
+        cached = cache.get(key)
+
+        if cached is None:
+            results = self.get_results(request, params)
+            questions_page = results['questions_page']
+            cache.set(key, {
+                'facets': results['facets'],
+                'question_ids': [question.id for question in questions_page],
+                'number': questions_page.number,
+                'next_cursor': questions_page.next_cursor,
+                'previous_cursor': questions_page.previous_cursor,
+                'article_ids': [article.id for article in results['articles']],
+                'questions_count': results['questions_count'],
+                'articles_count': results['articles_count'],
+            }, SEARCH_CACHE_TIMEOUT)
+            return results
+
+        questions = Question.objects.in_bulk(cached['question_ids'])
+        articles = PublishedArticle.objects.in_bulk(cached['article_ids'])
+
+        paginator = CursorPaginator(
+            Question.objects.none(),
+            self.ITEMS_PER_PAGE,
+            count=cached['questions_count'])
+        questions_page = CursorPage(
+            [questions[pk] for pk in cached['question_ids'] if pk in questions],
+            cached['number'],
+            paginator,
+            next_cursor=cached['next_cursor'],
+            previous_cursor=cached['previous_cursor'])
+
+        return {
+            'facets': cached['facets'],
+            'questions_page': questions_page,
+            'articles': [articles[pk] for pk in cached['article_ids'] if pk in articles],
+            'questions_count': cached['questions_count'],
+            'articles_count': cached['articles_count'],
+        }
+
     def get(self, request):
 
         # load page from session if arriving from Submit Answer/Review Answer
@@ -256,13 +347,24 @@ class SearchView(View):
                 del request.session['review_answers_url']
                 return redirect(redirect_url)
 
-        # load filters
-        filters = self.set_filters(request.GET)
+        params = self.get_search_params(request)
+        page_title = self.get_page_title(request)
+
+        if self.use_result_cache(request):
+            results = self.get_cached_results(request, params)
+        else:
+            results = self.get_results(request, params)
 
-        results = self.get_querysets(request)
+        facets = results['facets']
+        questions_page = results['questions_page']
+        self.prefetch_results(questions_page.object_list)
+        articles = results['articles']
 
-        questions = results.get('questions') or Question.objects.none()
-        articles = results.get('articles') or Article.objects.none()
+        language = self.get_translation_language(request)
+        prefetch_translations(questions_page.object_list, language)
+        prefetch_translations(articles, language)
+        questions_count = results['questions_count']
+        articles_count = results['articles_count']
 
         # get values for filter
         subjects = [
@@ -279,141 +381,50 @@ class SearchView(View):
             'Arts & Recreation',
         ]
 
-        # TODO: Generalise the category filter
-        question_categories = self.filters.get('question_categories', [])
-        if len(question_categories) != 0:
-            questions_queryset = []
-
-            if 'answered' in question_categories:
-                answered_questions = questions.filter(answers__status='published')
-                questions_queryset = answered_questions
-
-            if 'unanswered' in question_categories:
-                unanswered_questions = questions.exclude(answers__status='published')
-
-                if type(questions_queryset) is QuerySet:
-                    questions_queryset = questions_queryset | unanswered_questions
-                else:
-                    questions_queryset = unanswered_questions
-
-            questions = questions_queryset
-
-
-        available_subjects = list(questions.order_by()
-                                        .values_list('field_of_interest', flat=True)
-                                        .distinct('field_of_interest')
-                                        .values_list('field_of_interest'))
-
-        # convert list of tuples to list of strings
-        available_subjects = [''.join(item) for item in available_subjects]
-
-        states = questions.order_by() \
-            .values_list('state') \
-            .distinct('state') \
-            .values('state') \
-            .exclude(state__exact='') \
-            .exclude(state__isnull=True)
-
-        curriculums = questions.order_by() \
-                            .values_list('curriculum_followed') \
-                            .distinct('curriculum_followed') \
-                            .values('curriculum_followed') \
-                            .exclude(curriculum_followed__exact='') \
-                            .exclude(curriculum_followed__isnull=True)
-
-        languages = questions.order_by() \
-            .values_list('language') \
-            .distinct('language') \
-            .values('language') \
-            .exclude(language__exact='') \
-            .exclude(language__isnull=True)
-
-        # apply filters if any
-        subjects_to_filter_by = [urllib.parse.unquote(item) for item in request.GET.getlist('subject')]
-        if subjects_to_filter_by:
-            questions = questions.filter(field_of_interest__in=subjects_to_filter_by)
-
-        states_to_filter_by = [urllib.parse.unquote(item) for item in request.GET.getlist('state')]
-        if states_to_filter_by:
-            questions = questions.filter(state__in=states_to_filter_by)
-
-        curriculums_to_filter_by = [urllib.parse.unquote(item) for item in request.GET.getlist('curriculum')]
-        if curriculums_to_filter_by:
-            questions = questions.filter(curriculum_followed__in=curriculums_to_filter_by)
-
-        languages_to_filter_by = [urllib.parse.unquote(item) for item in request.GET.getlist('language')]
-        if languages_to_filter_by:
-            questions = questions.filter(language__in=languages_to_filter_by)
-            articles = articles.filter(language__in=languages_to_filter_by) # TODO support translations
-
-
-        # sort the questions if sort-by parameter exists
-        # default: newest and comments(for Review Answers page)
-        page_title = self.get_page_title(request)
-        if page_title == _('Review Answers'):
-            sort_by = request.GET.get('sort-by', 'comments')
-        else:
-            sort_by = request.GET.get('sort-by', 'newest')
-
-
-        if sort_by == 'newest':
-            questions = questions.order_by('-created_on')
-            articles = articles.order_by('-published_on')
-        if sort_by == 'oldest':
-            questions = questions.order_by('created_on')
-            articles = articles.order_by('published_on')
-        if sort_by == 'comments':
-            questions = questions
-            articles = articles
-        if sort_by == "date":
-            questions = questions.order_by('published_date')
-            articles = articles.order_by('published_on')
-
-        # save list of IDs for Submit Answer/Review Answer
-        if page_title == _('Review Answers') or page_title == _('Answer Questions'):
-            result_id_list = [id['id'] for id in questions.values('id')]
-            request.session['result_id_list'] = result_id_list
-        
-
-        ITEMS_PER_PAGE = 15
-
-        paginator = Paginator(questions, ITEMS_PER_PAGE)
-        page = request.GET.get('page', 1)
+        available_subjects = [value for value, count in facets['subject']]
+        states = [
+            {'state': value, 'count': count}
+            for value, count in facets['state']
+        ]
+        curriculums = [
+            {'curriculum_followed': value, 'count': count}
+            for value, count in facets['curriculum']
+        ]
+        languages = [
+            {'language': value, 'count': count}
+            for value, count in facets['language']
+        ]
 
+        page = questions_page.number
 
         # Adding the number of questions/articles being shown based on the page number
-        start_index = (int(page)-1)*ITEMS_PER_PAGE + 1
+        start_index = (page-1)*self.ITEMS_PER_PAGE + 1
 
-        search_categories = self.filters.get('search_categories', [])
-
-        if ('articles' in search_categories and not 'questions' in search_categories):
-            if (start_index + ITEMS_PER_PAGE <=  articles.count()):
-                end_index = start_index + ITEMS_PER_PAGE
+        if ('articles' in params.categories and not 'questions' in params.categories):
+            if (start_index + self.ITEMS_PER_PAGE <= articles_count):
+                end_index = start_index + self.ITEMS_PER_PAGE
             else:
-                end_index = articles.count()
+                end_index = articles_count
         else:
-            if (start_index + ITEMS_PER_PAGE <= questions.count()):
-                end_index = start_index + ITEMS_PER_PAGE
+            if (start_index + self.ITEMS_PER_PAGE <= questions_count):
+                end_index = start_index + self.ITEMS_PER_PAGE
             else:
-                end_index = questions.count() + articles.count()
-        print(start_index, end_index)
-
-
-
-        questions_page_one = paginator.get_page(page)
+                end_index = questions_count + articles_count
 
         # get list of IDs of bookmarked items
-        bookmark_id_list = Bookmark.objects.filter(user_id=request.user.id) \
-                                           .values_list('question_id') \
-                                           .values('question_id')
-        bookmarks = [bookmark['question_id'] for bookmark in bookmark_id_list]
+        bookmarks = []
+        if request.user.is_authenticated:
+            bookmark_id_list = Bookmark.objects.filter(user_id=request.user.id) \
+                                               .values_list('question_id') \
+                                               .values('question_id')
+            bookmarks = [bookmark['question_id'] for bookmark in bookmark_id_list]
 
         context = {
             'grey_background': 'True',
             'page_title': page_title,
             'enable_breadcrumbs': self.get_enable_breadcrumbs(request),
-            'questions': questions_page_one,
-            'result_size': questions.count(), 
+            'questions': questions_page,
+            'result_size': questions_count,
             'start_index': start_index,
             'end_index': end_index,
             'subjects': subjects,
@@ -421,22 +432,22 @@ class SearchView(View):
             'states': states,
             'curriculums': curriculums,
             'languages': languages,
-            'subjects_to_filter_by': subjects_to_filter_by,
-            'states_to_filter_by': states_to_filter_by,
-            'curriculums_to_filter_by': curriculums_to_filter_by,
-            'languages_to_filter_by': languages_to_filter_by,
+            'subjects_to_filter_by': params.get_facet('subject'),
+            'states_to_filter_by': params.get_facet('state'),
+            'curriculums_to_filter_by': params.get_facet('curriculum'),
+            'languages_to_filter_by': params.get_facet('language'),
             'bookmarks': bookmarks,
             'search_query': self.get_search_query(request),
-            'sort_by': sort_by,
-            'question_categories': question_categories
+            'sort_by': params.sort,
+            'question_categories': params.question_categories,
         }
 
         # only show articles on first page
         # TODO: make pagination smarter and inclusive
         # of all data types
-        if articles and page == 1:
+        if articles:
             context['articles'] = articles
-            context['result_size'] = context['result_size'] + articles.count()
+            context['result_size'] = context['result_size'] + articles_count
 
         # create list of active categories
         if page_title == _('Search') or page_title == _('Translate Content'):
@@ -454,14 +465,14 @@ class SearchView(View):
 
 class ViewAnswer(View):
     def get(self, request, question_id, answer_id):
-        question = Question.objects.get(pk=question_id)
-        answer = Answer.objects.get(pk=answer_id)
-
         # Set languages
         preferred_language = request.GET.get('lang')
-        if preferred_language:
-            question.set_language(preferred_language)
-            answer.set_language(preferred_language)
+        question = (Question.objects
+            .prefetch_translations(preferred_language)
+            .get(pk=question_id))
+        answer = (Answer.objects
+            .prefetch_translations(preferred_language)
+            .get(pk=answer_id))
 
         grey_background = 'True' if request.user.is_authenticated else 'False'
 
@@ -478,7 +489,10 @@ class ViewAnswer(View):
 
 class ArticleView(View):
     def get(self, request, article, slug=None):
-        article = get_object_or_404(Article, id=article)
+        lang = request.GET.get('lang')
+        article = get_object_or_404(
+            Article.objects.prefetch_translations(lang),
+            id=article)
 
         # Don't allow other people to see an unpublished draft
         if article.is_draft and article.author != request.user:
@@ -504,10 +518,6 @@ class ArticleView(View):
                 request.GET.urlencode(),
             ]))
 
-        # Populate with language
-        lang = request.GET.get('lang')
-        if lang: article.set_language(lang)
-
         context = {
             'article': article,
             'page_title': 'View Article',
@@ -847,16 +857,25 @@ class ResourcesPage(View):
 
 class ArticlesPage(View):
 
+    ARTICLES_PER_PAGE = 12
+
     def get(self, request):
-        articles = PublishedArticle.objects.all()
+        # some older articles have no publication date; fall back to
+        # when they were created so that every article has a sort key
+        articles = (PublishedArticle.objects
+            .annotate_translations(get_language())
+            .annotate(sort_date=Coalesce('published_on', 'created_on')))
         sort_by = request.GET.get('sort-by', 'newest')
 
         if sort_by == 'newest':
-            articles = articles.order_by('-published_on')
+            articles = articles.order_by('-sort_date')
         else:
-            articles = articles.order_by('published_on')
+            articles = articles.order_by('sort_date')
+
+        paginator = CursorPaginator(articles, self.ARTICLES_PER_PAGE)
+        articles_page = paginator.get_page(request.GET.get('cursor'))
 
-        if len(articles) % 2 == 0:
+        if len(articles_page) % 2 == 0:
             odd_article_count = 'False'
         else:
             odd_article_count = 'True'
@@ -865,15 +884,15 @@ class ArticlesPage(View):
         article_body= []
 
 
-        for i in articles:
-            ref = i.body
+        for i in articles_page:
+            ref = i.tr_body
             fig_stripped = re.sub(r'\<figcaption\>.*?\<\/figcaption\>', '', ref)
             article_body.append(fig_stripped)
         
 
         context = {
             'page_title': _('Articles'),
-            'articles': articles,
+            'articles': articles_page,
             'stripped_articles': article_body,
             'odd_article_count': odd_article_count,
             'sort_by': sort_by
@@ -900,6 +919,11 @@ class AnalyticsPage(View):
         # Translators: For all the language names in the database we need tranlation 
         # Each function getABC() returns the data for the ABC which is then added to context.
 
+        # All the charts are worked out from the pre-aggregated question
+        # statistics, which are fetched once here
+        self.statistics = list(QuestionStatistics.objects.values(
+            *QuestionStatistics.DIMENSIONS, 'question_count'))
+
         year_labels, year_counts = self.getYearAsked()
         lang_names, lang_counts = self.getQuestionLanguages()
         gender_labels, gender_counts = self.getGenderStat()
@@ -938,16 +962,29 @@ class AnalyticsPage(View):
             })
 
 
+    def countBy(self, *fields):
+        """
+        Returns an ordered dictionary of {value: number of questions} for
+        the given field, or {(value, value, ...): number of questions}
+        when grouping by several fields
+        """
+        counts = collections.OrderedDict()
+        for row in self.statistics:
+            key = tuple(row[field] for field in fields)
+            if len(fields) == 1:
+                key = key[0]
+            counts[key] = counts.get(key, 0) + row['question_count']
+        return counts
+
+
     def getQuestionCount(self, params = None):
-        return Question.objects.count()
+        return sum(row['question_count'] for row in self.statistics)
 
 
     def getQuestionLanguages(self, params=None):
-        distinct = Question.objects.values('language').annotate(count=Count('language'))
         lang_names = []         # list to hold the name of the language
         lang_counts = []        # list to hold the count of question for the language corresponding to name in lang_names 
-        for lang in distinct:
-            lang_code = lang['language']
+        for lang_code, count in self.countBy('language').items():
             if lang_code in language_name:
                 lang_name = language_name[lang_code]
             else:
@@ -959,24 +996,18 @@ class AnalyticsPage(View):
                 continue
 
             lang_names.append(lang_name)
-            lang_counts.append(lang['count'])
+            lang_counts.append(count)
 
         return lang_names, lang_counts
 
 
     def getYearAsked(self, params = None):
-        distinct = Question.objects.values('question_asked_on').annotate(count=Count('question_asked_on'))
-        year_tuples = [(tple['question_asked_on'].year if tple['question_asked_on'] else None, tple['count']) for tple in distinct ]
         year_dict = {}
-        for year, count in year_tuples:
-            if year is None:  #Some tuples might be None due to null value in database
+        for year, count in self.countBy('year_asked').items():
+            if year is None:  #Some rows might be None due to null value in database
                 continue
-            if year not in year_dict:
-                year_dict[year] = count
-            else:
-                year_dict[year] += count
+            year_dict[year] = count
         # Now we shall generate the lists of year labels and counts
-        year_label, year_count = [], []
         ordered_tuples = collections.OrderedDict(sorted(year_dict.items()))
         year_labels = list(map(str, ordered_tuples.keys()))
         year_counts = list(ordered_tuples.values())
@@ -985,9 +1016,8 @@ class AnalyticsPage(View):
 
     def getGenderStat(self, params = None):
         gender_list = ["Male", "Female", "Non-binary", ""]
-        gender_data = []
-        for gender in gender_list:
-                gender_data.append(Question.objects.filter(student_gender = gender).count())
+        gender_counts = self.countBy('student_gender')
+        gender_data = [gender_counts.get(gender, 0) for gender in gender_list]
         return ["Male", "Female", "Non-binary", "Not known"], gender_data
 
     def getGenderSubjectDictionary(self, params= None):
@@ -1018,36 +1048,36 @@ class AnalyticsPage(View):
         }  # history/philosophy is part of STEMS : Update as per JR's comment on Zulip
            # Earth & Environment is part of STEMS
         
+        counts = self.countBy('student_gender', 'field_of_interest')
         genderSubjectDictionary = {'Male': {}, 'Female': {}, 'Non-binary': {}, 'Not known': {}}
         for gender in gender_list:
             for subject_name in stems_subjects:
                 genderSubjectDictionary[_(gender) if gender!='' else _("Not known")][_(subject_name)]  \
-                =  sum([Question.objects.filter(student_gender = gender, field_of_interest = subject_alias).count() for subject_alias in stems_subjects[subject_name]])
+                =  sum([counts.get((gender, subject_alias), 0) for subject_alias in stems_subjects[subject_name]])
             
             for subject_name in non_stems_subjects:
                 genderSubjectDictionary[_(gender) if gender!='' else _("Not known")][_(subject_name)]   \
-                =  sum([Question.objects.filter(student_gender = gender, field_of_interest = subject_alias).count() for subject_alias in non_stems_subjects[subject_name]])
+                =  sum([counts.get((gender, subject_alias), 0) for subject_alias in non_stems_subjects[subject_name]])
 
         return genderSubjectDictionary
 
     def getLanguageGenderDictionary(self, params = None):
         gender_list = ["Male", "Female", "Non-binary", ""]
-        language_list = list(map(lambda x: x[0], Question.objects.order_by().values_list('language').distinct()))
+        language_list = list(self.countBy('language'))
         lang_names = [language_name[lang] if lang in language_name else lang for lang in language_list]  # get the proper names of languages
+        counts = self.countBy('student_gender', 'language')
         languageGenderDictionary = {lang_name: {} for lang_name in lang_names}
         for lang_index in range(len(language_list)):
             for gender in gender_list:
                 lang = language_list[lang_index]
                 lang_name = lang_names[lang_index]
-                languageGenderDictionary[_(lang_name)][_(gender) if gender!='' else _("Not known")] = Question.objects.filter(student_gender = gender, language = lang).count()
+                languageGenderDictionary[_(lang_name)][_(gender) if gender!='' else _("Not known")] = counts.get((gender, lang), 0)
         return languageGenderDictionary
 
     def getMediumLanguage(self, params = None):
-        distinct = Question.objects.values('medium_language').annotate(count=Count('medium_language'))
         mlang_names = []         # list to hold the name of the language
         mlang_counts = []        # list to hold the count of question for the language corresponding to name in lang_names 
-        for lang in distinct:
-            lang_code = lang['medium_language']
+        for lang_code, count in self.countBy('medium_language').items():
             if lang_code in language_name:              # This won't work here because medium is not stored using language code
                 lang_name = language_name[lang_code]    # Might be useful if the database if updated and medium language is stored using code
             else:
@@ -1058,12 +1088,11 @@ class AnalyticsPage(View):
             if lang_name == "":         # null values for languages are captured as "Other" 
                 lang_name = "Other"  
             mlang_names.append(lang_name)
-            mlang_counts.append(lang['count'])
+            mlang_counts.append(count)
         return mlang_names, mlang_counts
 
     def getStudentClassStat(self, params = None):
-        distinct = Question.objects.values('student_class').annotate(count=Count('student_class'))
-        class_tuples = sorted([(tple['student_class'] if tple['student_class'] else "Not known", tple['count']) for tple in distinct], key = lambda item : item[0])
+        class_tuples = sorted([(student_class if student_class else "Not known", count) for student_class, count in self.countBy('student_class').items()], key = lambda item : item[0])
         # Cleaning tuples as classes are stored as 10, 10.0 ... etc
         ## Can use: clases_names = {"4,5,6": "Primary", "10,11": "Secondary", "6,7,8": "Middle School" }.update({i:i for i in range(1,13)})
         dct = {i:0 for i in range(1,13)}
@@ -1082,34 +1111,29 @@ class AnalyticsPage(View):
 
 
     def getQuestionFormatStats(self):
-        distinct = Question.objects.values('question_format').annotate(count=Count('question_format'))
-        format_tuples = sorted([(tple['question_format'] if tple['question_format'] else "Other", tple['count']) for tple in distinct], key = lambda item : item[0])
+        format_tuples = sorted([(question_format if question_format else "Other", count) for question_format, count in self.countBy('question_format').items()], key = lambda item : item[0])
         return map(list, zip(*format_tuples))
 
     def getCurriculumStats(self):
-        distinct = Question.objects.values('curriculum_followed').annotate(count=Count('curriculum_followed'))
-        curriculum_tuples = sorted([(tple['curriculum_followed'] if tple['curriculum_followed'] else "Other", tple['count']) for tple in distinct], key = lambda item : item[0])
+        curriculum_tuples = sorted([(curriculum if curriculum else "Other", count) for curriculum, count in self.countBy('curriculum_followed').items()], key = lambda item : item[0])
         return map(list, zip(*curriculum_tuples))
 
     def getContextStats(self):
-        distinct = Question.objects.values('context').annotate(count=Count('context'))
         context_tuples = sorted([
-                (tple['context'] 
-                if (tple['context'] and tple['context'] != "Other (elaborate in the Notes column)") 
-                else "Other", tple['count']) for tple in distinct],
+                (context 
+                if (context and context != "Other (elaborate in the Notes column)") 
+                else "Other", count) for context, count in self.countBy('context').items()],
             key = lambda item : item[0])
         return map(list, zip(*context_tuples))
 
     def getMapStats(self):
-        distinct = Question.objects.values('state').annotate(count=Count('state'))    # place from where question is asked is in column state
         states, codes, counts = list(), list(), list()
-        for stateCountPairDict in distinct:
-            state = stateCountPairDict['state']
+        for state, count in self.countBy('state').items():    # place from where question is asked is in column state
             if state.lower() not in self.state_code:
                 continue
             states.append(state)
             codes.append(self.state_code[state.lower()])
-            counts.append(stateCountPairDict['count'])
+            counts.append(count)
         return states, codes, counts
 
     def getCountryStats(self):
@@ -1127,45 +1151,63 @@ class AnalyticsPage(View):
         return json.dumps(lst)
         
 
+@method_decorator(cache_control(public=True, max_age=5 * 60), name='dispatch')
 class Suggestions(View):
     def get(self, request):
-        lst_dir = os.path.abspath(os.path.join(os.path.dirname( __file__ ),"../assets/suggestions/")) 
-
-        if not os.path.exists(lst_dir):
-            os.makedirs(lst_dir)
+        try:
+            limit = int(request.GET.get('limit', DEFAULT_SUGGESTION_LIMIT))
+        except ValueError:
+            limit = DEFAULT_SUGGESTION_LIMIT
+        limit = min(max(limit, 1), MAX_SUGGESTION_LIMIT)
 
-        f_path = os.path.abspath(os.path.join(lst_dir, 'suggestions.csv'))
+        index = get_suggestion_index()
+        return JsonResponse({
+            'suggestion': index.search(request.GET.get('q', ''), limit),
+        })
 
-        sugg_lst = []
 
-        if not os.path.isfile(f_path):
-            ques = Question.objects.all()
-            with open(f_path, 'w', newline='' , encoding='utf-8') as f:
-                writer = csv.writer(f, delimiter=',')
-                for i in ques:
-                    if not i.question_text_english == "":
-                        sugg_lst.append(i.question_text_english)
-                        writer.writerow([i.question_text_english])
+class DownloadQuestions(View):
+    """
+    Stream the questions matching the search filters as a file, for
+    researchers who want the whole dataset (see
+    public_website.downloads)
+    """
 
-            return JsonResponse({"suggestion": sugg_lst})
+    def get(self, request):
+        try:
+            download = Download(request.GET)
+        except DownloadError as e:
+            return HttpResponseBadRequest(str(e))
+
+        etag = download.get_etag()
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        # ranges can only be served once the length is known, and
+        # only of the same version of the download
+        length = download.get_length(etag)
+        byte_range = None
+        if length is not None and request.headers.get('If-Range', etag) == etag:
+            byte_range = parse_range(request.headers.get('Range'), length)
+
+        if byte_range is not None:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                download.stream(etag, start, end),
+                status=206,
+                content_type=download.content_type)
+            response['Content-Range'] = 'bytes {}-{}/{}'.format(start, end, length)
+            response['Content-Length'] = end - start + 1
         else:
-            modTimestamp = os.path.getmtime(os.path.abspath(os.path.join(lst_dir, 'suggestions.csv')))
-            modificationTime = ts.fromtimestamp(modTimestamp)             
-            current_time = datetime.datetime.now() 
-
-            if (current_time - modificationTime) > timedelta(1): 
-                ques = Question.objects.all()
-                with open(f_path, 'w', newline='' , encoding='utf-8') as f:
-                    writer = csv.writer(f, delimiter=',')
-                    for i in ques:
-                        if not i.question_text_english == "":
-                            sugg_lst.append(i.question_text_english)
-                            writer.writerow([i.question_text_english])
-
-                return JsonResponse({"suggestion": sugg_lst})
-            else:
-                with open(f_path, 'r',encoding='utf-8') as f:
-                    reader = csv.reader(f)
-                    for i in reader:
-                        sugg_lst.append(''.join(i))
-                return JsonResponse({"suggestion": sugg_lst})
+            response = StreamingHttpResponse(
+                download.stream(etag),
+                content_type=download.content_type)
+            if length is not None:
+                response['Content-Length'] = length
+
+        response['ETag'] = etag
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Disposition'] = 'attachment; filename="{}"'.format(download.file_name)
+        return response